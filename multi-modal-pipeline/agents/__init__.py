@@ -1,9 +1,19 @@
-import google.generativeai as genai
+import json
+import time
 from abc import ABC, abstractmethod
-from config.settings import get_api_key, MODEL_CONFIG
+from config.settings import get_api_key, CASSETTE, MODEL_CONFIG, SCHEDULER
 
-# Configure the API
-genai.configure(api_key=get_api_key())
+# The Gemini SDK is heavy to import, so it is loaded and configured on first use
+_genai = None
+
+def get_genai():
+    # Import and configure the Gemini SDK once, the first time a model is needed
+    global _genai
+    if _genai is None:
+        import google.generativeai as genai
+        genai.configure(api_key=get_api_key())
+        _genai = genai
+    return _genai
 
 class BaseAgent(ABC):
     # Base class for all agents in the pipeline
@@ -11,16 +21,60 @@ class BaseAgent(ABC):
     def __init__(self, model_name=None, temperature=None):
         self.model_name = model_name or MODEL_CONFIG["text_model"]
         self.temperature = temperature or MODEL_CONFIG["temperature"]
-        self.model = genai.GenerativeModel(model_name=self.model_name)
+        self._model = None
+        self.batcher = None  # Optional MicroBatcher shared with other pipelines
+    
+    @property
+    def model(self):
+        # Create the model client lazily so constructing agents stays cheap
+        if self._model is None:
+            self._model = get_genai().GenerativeModel(model_name=self.model_name)
+        return self._model
     
     @abstractmethod
     async def execute(self, content_request, context=None):
         # Execute the agent's specific task
         pass
     
-    def _create_generation_config(self, temperature=None):
+    async def _generate(self, contents, max_output_tokens=None):
+        # Single entry point for model calls made by the agents
+        if not SCHEDULER["enabled"]:
+            return await self._call_model(contents, max_output_tokens)
+        
+        # Wait for a slot in the shared pool, in the lane of the request being served
+        # (imported here to keep asyncio out of the package's import time)
+        from utils.scheduler import get_scheduler
+        requested_at = time.perf_counter()
+        async with get_scheduler().slot():
+            return await self._call_model(contents, max_output_tokens, requested_at)
+    
+    async def _call_model(self, contents, max_output_tokens=None, requested_at=None):
+        # Calls go through the cassette when recording or replaying; a replayed
+        # call still holds its scheduler slot for the recorded latency
+        if CASSETTE["mode"] in ("record", "replay"):
+            from utils.cassette import get_cassette
+            return await get_cassette().acall(
+                self.model_name, type(self).__name__, contents,
+                lambda: self._call_live_model(contents, max_output_tokens),
+                requested_at=requested_at
+            )
+        return await self._call_live_model(contents, max_output_tokens)
+    
+    async def _call_live_model(self, contents, max_output_tokens=None):
+        generation_config = self._create_generation_config(max_output_tokens=max_output_tokens)
+        return await self.model.generate_content_async(contents, generation_config=generation_config)
+    
+    async def _generate_json(self, prompt):
+        # Generate and parse a JSON response, through the micro-batcher when one is attached
+        if self.batcher is not None:
+            return await self.batcher.submit(prompt)
+        
+        response = await self._generate(prompt)
+        return json.loads(response.text.strip())
+    
+    def _create_generation_config(self, temperature=None, max_output_tokens=None):
         # Create generation config for the model
-        return genai.types.GenerationConfig(
+        return get_genai().types.GenerationConfig(
             temperature=temperature or self.temperature,
-            max_output_tokens=MODEL_CONFIG["max_tokens"]
+            max_output_tokens=max_output_tokens or MODEL_CONFIG["max_tokens"]
         )
\ No newline at end of file
@@ -1,10 +1,35 @@
+import hashlib
 from io import BytesIO
-from PIL import Image
 from datetime import datetime
 from typing import Dict
-import google.generativeai as genai
 from agents import BaseAgent
-from config.settings import MODEL_CONFIG, BRAND_GUIDELINES, IMAGES_DIR
+from config.settings import MODEL_CONFIG, BRAND_GUIDELINES, IMAGES_DIR, RESULT_RETENTION, ensure_output_dirs
+from utils.prompts import PromptTemplate
+
+IMAGE_PROMPT = PromptTemplate("image_creator", """
+        Create a professional, high-quality image for {platform} content about: {topic}
+        
+        Style Requirements:
+        - {style} design aesthetic
+        - Brand colors: {colors}
+        - Professional and engaging
+        - Suitable for business/professional audience
+        - Modern, clean composition
+        
+        Content Context: {content_context}
+        
+        Specifications:
+        - High resolution and quality
+        - Clear focal point
+        - Appropriate for social media sharing
+        - Visually appealing and professional
+        - On-brand visual elements
+        
+        Create an image that complements the content and attracts audience attention.
+""", static={
+    "style": BRAND_GUIDELINES["style"],
+    "colors": ", ".join(BRAND_GUIDELINES["color_palette"])
+})
 
 class ImageCreatorAgent(BaseAgent):
     # Generates images using Gemini 2.5 Flash Image model
@@ -25,10 +50,7 @@ class ImageCreatorAgent(BaseAgent):
         
         try:
             # Generate image using Gemini 2.5 Flash Image
-            response = await self.model.generate_content_async(
-                contents=[image_prompt],
-                generation_config=self._create_generation_config()
-            )
+            response = await self._generate([image_prompt])
             
             # Extract image data from response
             image_data = None
@@ -41,13 +63,21 @@ class ImageCreatorAgent(BaseAgent):
                 # Save image locally
                 image_path = self._save_image(image_data, content_request)
                 
-                return {
+                result = {
                     "agent": "image_creator",
                     "image_path": str(image_path),
-                    "prompt_used": image_prompt,
                     "platform": platform,
                     "success": True
                 }
+                
+                # The prompt is large and reproducible, so keep only its fingerprint by default
+                if RESULT_RETENTION["store_image_prompts"]:
+                    result["prompt_used"] = image_prompt
+                else:
+                    result["prompt_hash"] = hashlib.sha256(image_prompt.encode("utf-8")).hexdigest()[:16]
+                    result["prompt_chars"] = len(image_prompt)
+                
+                return result
             else:
                 return {
                     "agent": "image_creator",
@@ -66,32 +96,12 @@ class ImageCreatorAgent(BaseAgent):
         # Build detailed image generation prompt
         
         topic = content_request.get("topic", "business content")
-        style = BRAND_GUIDELINES["style"]
-        colors = ", ".join(BRAND_GUIDELINES["color_palette"])
-        
-        prompt = f"""
-        Create a professional, high-quality image for {platform} content about: {topic}
-        
-        Style Requirements:
-        - {style} design aesthetic
-        - Brand colors: {colors}
-        - Professional and engaging
-        - Suitable for business/professional audience
-        - Modern, clean composition
-        
-        Content Context: {text_content.get('title', topic)}
         
-        Specifications:
-        - High resolution and quality
-        - Clear focal point
-        - Appropriate for social media sharing
-        - Visually appealing and professional
-        - On-brand visual elements
-        
-        Create an image that complements the content and attracts audience attention.
-        """
-        
-        return prompt.strip()
+        return IMAGE_PROMPT.render(
+            platform=platform,
+            topic=topic,
+            content_context=text_content.get('title', topic)
+        )
     
     def _save_image(self, image_data: bytes, content_request: Dict) -> str:
         # Save generated image to local storage 
@@ -101,9 +111,13 @@ class ImageCreatorAgent(BaseAgent):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"{topic}_{timestamp}.png"
         
+        ensure_output_dirs()
         image_path = IMAGES_DIR / filename
         
         try:
+            # PIL is only needed once an image actually comes back
+            from PIL import Image
+            
             # Convert bytes to PIL Image and save
             image_bytes = BytesIO(image_data)
             image = Image.open(image_bytes)
@@ -1,25 +1,18 @@
-import json
 from typing import Dict, List
 from agents import BaseAgent
+from utils.prompts import PromptTemplate, compact_json, request_json
 
-class QualityAssuranceAgent(BaseAgent):
-    # Reflection Pattern: Reviews and iteratively improves content quality
-    
-    def __init__(self):
-        super().__init__(temperature=0.2)  # Lower temperature for consistent evaluation
-    
-    async def execute(self, content_request: Dict, context=None) -> Dict:
-        # Review all agent outputs and provide improvement feedback
-        
-        all_outputs = context.get("agent_outputs", {}) if context else {}
-        
-        qa_prompt = f"""
+QA_PROMPT = PromptTemplate("qa_agent", """
         Review and evaluate all content outputs for quality and goal achievement:
         
-        Original Request: {json.dumps(content_request, indent=2)}
+        Original Request: {request}
         
         Agent Outputs:
-        {json.dumps(all_outputs, indent=2)}
+        {agent_outputs}
+        
+        Platform constraints (character, word and hashtag limits) were already checked
+        locally with exact counts: {platform_validation}
+        Treat those counts as authoritative and do not request revisions for limits it reports as met.
         
         Evaluate on these criteria:
         1. Goal Achievement (1-10): Does content meet original request?
@@ -53,15 +46,28 @@ class QualityAssuranceAgent(BaseAgent):
         }}
         
         Be constructive and specific in feedback.
-        """
+""")
+
+class QualityAssuranceAgent(BaseAgent):
+    # Reflection Pattern: Reviews and iteratively improves content quality
+    
+    def __init__(self):
+        super().__init__(temperature=0.2)  # Lower temperature for consistent evaluation
+    
+    async def execute(self, content_request: Dict, context=None) -> Dict:
+        # Review all agent outputs and provide improvement feedback
+        
+        all_outputs = context.get("agent_outputs", {}) if context else {}
+        platform_validation = all_outputs.get("text_generator", {}).get("platform_validation", {})
+        
+        qa_prompt = QA_PROMPT.render(
+            request=request_json(content_request, context),
+            agent_outputs=compact_json(all_outputs),
+            platform_validation=compact_json(platform_validation)
+        )
         
         try:
-            response = await self.model.generate_content_async(
-                qa_prompt,
-                generation_config=self._create_generation_config()
-            )
-            
-            result = json.loads(response.text.strip())
+            result = await self._generate_json(qa_prompt)
             result["agent"] = "qa_agent"
             
             return result
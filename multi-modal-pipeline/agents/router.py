@@ -1,22 +1,12 @@
-import json
 from typing import Dict, List
 from agents import BaseAgent
 from config.settings import PLATFORMS, BRAND_GUIDELINES
+from utils.prompts import PromptTemplate, compact_json, request_json
 
-class ContentRouterAgent(BaseAgent):
-    # Routing Pattern: Analyzes requests and determines which agents to invoke
-    
-    def __init__(self):
-        # Lower temperature for consistent routing
-        super().__init__(temperature=0.3)  
-    
-    async def execute(self, content_request: Dict, context=None) -> Dict:
-        # Analyze request and determine routing strategy
-        
-        routing_prompt = f"""
+ROUTING_PROMPT = PromptTemplate("router", """
         Analyze this content request and determine which agents should be involved:
         
-        Request: {json.dumps(content_request, indent=2)}
+        Request: {request}
         
         Available Agents:
         - text_generator: Creates written content
@@ -24,8 +14,8 @@ class ContentRouterAgent(BaseAgent):
         - seo_optimizer: Optimizes for search engines
         - brand_validator: Ensures brand compliance
         
-        Platform Capabilities: {json.dumps(PLATFORMS, indent=2)}
-        Brand Guidelines: {json.dumps(BRAND_GUIDELINES, indent=2)}
+        Platform Capabilities: {platforms}
+        Brand Guidelines: {brand_guidelines}
         
         Return a JSON object with:
         {{
@@ -39,16 +29,25 @@ class ContentRouterAgent(BaseAgent):
         }}
         
         Be precise and only include necessary agents.
-        """
+""", static={
+    "platforms": compact_json(PLATFORMS),
+    "brand_guidelines": compact_json(BRAND_GUIDELINES)
+})
+
+class ContentRouterAgent(BaseAgent):
+    # Routing Pattern: Analyzes requests and determines which agents to invoke
+    
+    def __init__(self):
+        # Lower temperature for consistent routing
+        super().__init__(temperature=0.3)  
+    
+    async def execute(self, content_request: Dict, context=None) -> Dict:
+        # Analyze request and determine routing strategy
+        
+        routing_prompt = ROUTING_PROMPT.render(request=request_json(content_request, context))
         
         try:
-            response = await self.model.generate_content_async(
-                routing_prompt,
-                generation_config=self._create_generation_config()
-            )
-            
-            # Parse the JSON response
-            routing_decision = json.loads(response.text.strip())
+            routing_decision = await self._generate_json(routing_prompt)
             
             # Validate and ensure required agents are included
             self._validate_routing_decision(routing_decision, content_request)
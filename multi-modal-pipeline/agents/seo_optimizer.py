@@ -1,22 +1,13 @@
-import json
 from typing import Dict
 from agents import BaseAgent
+from utils.prompts import PromptTemplate, compact_json
 
-class SEOOptimizerAgent(BaseAgent):
-    # Optimizes content for search engines and platform discoverability
-    
-    async def execute(self, content_request: Dict, context=None) -> Dict:
-        # Analyze and optimize content for SEO
-        
-        text_content = context.get("text_content", {}) if context else {}
-        platform = context.get("content_type", "blog") if context else "blog"
-        
-        seo_prompt = f"""
+SEO_PROMPT = PromptTemplate("seo_optimizer", """
         Analyze and optimize this content for SEO and platform discoverability:
         
-        Original Content: {json.dumps(text_content, indent=2)}
+        Original Content: {text_content}
         Platform: {platform}
-        Topic: {content_request.get('topic', 'general')}
+        Topic: {topic}
         
         Provide SEO optimization recommendations and enhanced elements:
         
@@ -37,15 +28,25 @@ class SEOOptimizerAgent(BaseAgent):
         2. Platform-specific optimization
         3. User engagement factors
         4. Discoverability improvements
-        """
+""")
+
+class SEOOptimizerAgent(BaseAgent):
+    # Optimizes content for search engines and platform discoverability
+    
+    async def execute(self, content_request: Dict, context=None) -> Dict:
+        # Analyze and optimize content for SEO
+        
+        text_content = context.get("text_content", {}) if context else {}
+        platform = context.get("content_type", "blog") if context else "blog"
+        
+        seo_prompt = SEO_PROMPT.render(
+            text_content=compact_json(text_content),
+            platform=platform,
+            topic=content_request.get('topic', 'general')
+        )
         
         try:
-            response = await self.model.generate_content_async(
-                seo_prompt,
-                generation_config=self._create_generation_config()
-            )
-            
-            result = json.loads(response.text.strip())
+            result = await self._generate_json(seo_prompt)
             result["agent"] = "seo_optimizer"
             result["platform"] = platform
             
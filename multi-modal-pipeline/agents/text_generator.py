@@ -1,31 +1,33 @@
-import json
-from typing import Dict
+from typing import Dict, List
 from agents import BaseAgent
 from config.settings import BRAND_GUIDELINES, PLATFORMS
+from utils.platform_validator import adapt_to_platform, validate_platform_content
+from utils.prompts import PromptTemplate, compact_json, request_json
 
-class TextGeneratorAgent(BaseAgent):
-    # Generates text content based on requirements and platform specifications
-    
-    async def execute(self, content_request: Dict, context=None) -> Dict:
-        # Generate text content based on request and routing context
-        
-        platform = context.get("content_type", "blog") if context else "blog"
-        platform_specs = context.get("platform_specs", PLATFORMS[platform]) if context else PLATFORMS[platform]
-        
-        generation_prompt = f"""
+_BRAND_STATIC = {
+    "brand_guidelines": compact_json(BRAND_GUIDELINES),
+    "tone": BRAND_GUIDELINES["tone"],
+    "keywords": BRAND_GUIDELINES["keywords"],
+    "avoid_words": BRAND_GUIDELINES["avoid_words"]
+}
+
+GENERATION_PROMPT = PromptTemplate("text_generator", """
         Create high-quality content based on these specifications:
         
-        Content Request: {json.dumps(content_request, indent=2)}
+        Content Request: {request}
         Platform: {platform}
-        Platform Specifications: {json.dumps(platform_specs, indent=2)}
-        Brand Guidelines: {json.dumps(BRAND_GUIDELINES, indent=2)}
+        Platform Specifications: {platform_specs}
+        Brand Guidelines: {brand_guidelines}
         
         Requirements:
-        1. Follow the brand tone: {BRAND_GUIDELINES['tone']}
-        2. Include brand keywords naturally: {BRAND_GUIDELINES['keywords']}
-        3. Avoid these words: {BRAND_GUIDELINES['avoid_words']}
+        1. Follow the brand tone: {tone}
+        2. Include brand keywords naturally: {keywords}
+        3. Avoid these words: {avoid_words}
         4. Adapt content length to platform requirements
         5. Make it engaging and valuable for the target audience
+        {violation_notes}
+        
+        {warm_start_notes}
         
         Return a JSON object with:
         {{
@@ -38,15 +40,65 @@ class TextGeneratorAgent(BaseAgent):
         }}
         
         Ensure content is original, valuable, and platform-optimized.
-        """
+""", static=_BRAND_STATIC)
+
+VARIANT_PROMPT = PromptTemplate("text_generator_variants", """
+        Adapt this core content into one variant per target platform:
+        
+        Content Request: {request}
+        Core Content: {core}
+        Target Platforms: {platforms}
+        
+        Requirements:
+        1. Keep the core message, facts and brand tone ({tone}) consistent across variants
+        2. Respect each platform's length and hashtag limits exactly
+        3. Avoid these words: {avoid_words}
+        
+        Return a JSON object with:
+        {{
+            "variants": {{
+                "<platform>": {{
+                    "title": "Platform title",
+                    "content": "Platform-specific body",
+                    "summary": "Brief summary",
+                    "hashtags": ["relevant", "hashtags"],
+                    "call_to_action": "Clear CTA"
+                }}
+            }}
+        }}
+""", static=_BRAND_STATIC)
+
+class TextGeneratorAgent(BaseAgent):
+    # Generates text content based on requirements and platform specifications
+    
+    async def execute(self, content_request: Dict, context=None) -> Dict:
+        # Generate text content based on request and routing context
+        
+        platform = context.get("content_type", "blog") if context else "blog"
+        platform_specs = context.get("platform_specs", PLATFORMS[platform]) if context else PLATFORMS[platform]
+        
+        # Platform limits the previous draft broke and that could not be fixed locally
+        previous_text = context.get("text_generator", {}) if context else {}
+        violations = previous_text.get("platform_validation", {}).get("violations", [])
+        violation_notes = f"6. Fix these platform violations from the previous draft: {violations}" if violations else ""
+        
+        # Approved draft from a near-duplicate brief, used as a starting point
+        warm_start = context.get("warm_start") if context else None
+        warm_start_notes = (
+            "Reference draft from a similar, already approved brief - adapt it to this request "
+            f"rather than starting from scratch: {compact_json(warm_start)}"
+        ) if warm_start else ""
+        
+        generation_prompt = GENERATION_PROMPT.render(
+            request=request_json(content_request, context),
+            platform=platform,
+            platform_specs=compact_json(platform_specs),
+            violation_notes=violation_notes,
+            warm_start_notes=warm_start_notes
+        )
         
         try:
-            response = await self.model.generate_content_async(
-                generation_prompt,
-                generation_config=self._create_generation_config()
-            )
-            
-            result = json.loads(response.text.strip())
+            result = await self._generate_json(generation_prompt)
             result["agent"] = "text_generator"
             result["platform"] = platform
             
@@ -59,4 +111,36 @@ class TextGeneratorAgent(BaseAgent):
                 "title": "Content Generation Failed",
                 "content": "Unable to generate content at this time.",
                 "platform": platform
-            }
\ No newline at end of file
+            }
+    
+    async def derive_variants(self, content_request: Dict, core_content: Dict, platforms: List[str],
+                              use_llm: bool = True, context: Dict = None) -> Dict:
+        # Derive variants of already generated core content for several platforms.
+        # All platforms are adapted in one batched call; any platform the model
+        # skips (or every platform, if the call fails) falls back to a local transform.
+        
+        core = {key: value for key, value in core_content.items() if key not in ("agent", "platform_validation")}
+        variants = {}
+        
+        if use_llm and platforms:
+            variant_prompt = VARIANT_PROMPT.render(
+                request=request_json(content_request, context),
+                core=compact_json(core),
+                platforms=compact_json({platform: PLATFORMS.get(platform, {}) for platform in platforms})
+            )
+            
+            try:
+                derived = (await self._generate_json(variant_prompt)).get("variants", {})
+                for platform in platforms:
+                    if isinstance(derived.get(platform), dict):
+                        variant = dict(derived[platform], agent="text_generator", platform=platform)
+                        variants[platform] = validate_platform_content(variant, platform)
+                
+            except Exception as e:
+                print(f"Variant generation failed, using local transforms: {str(e)}")
+        
+        for platform in platforms:
+            if platform not in variants:
+                variants[platform] = dict(adapt_to_platform(core_content, platform), agent="text_generator")
+        
+        return variants
\ No newline at end of file
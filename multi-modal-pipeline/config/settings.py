@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from pathlib import Path
 
 # Brand Guidelines
@@ -10,6 +11,26 @@ BRAND_GUIDELINES = {
     "style": "modern, clean"
 }
 
+# Brand Validation
+# tone_review: "always" asks the LLM for the tone assessment on every clean scan,
+# "when_inconclusive" only when the local keyword scan cannot settle the verdict
+BRAND_VALIDATION = {
+    "tone_review": "always"
+}
+
+# Near-duplicate brief reuse
+# mode: "direct" returns the matched approved outputs as-is,
+# "warm_start" hands them to the text generator as a reference draft
+BRIEF_REUSE = {
+    "enabled": False,
+    "mode": "warm_start",
+    "threshold": 0.8,
+    "num_perm": 64,
+    "bands": 16,
+    "max_entries": 10000,
+    "load_saved_results": False
+}
+
 # Model Configuration
 MODEL_CONFIG = {
     "text_model": "gemini-2.5-flash",
@@ -18,6 +39,37 @@ MODEL_CONFIG = {
     "max_tokens": 2048
 }
 
+# Cross-request micro-batching of agent prompts (opt-in)
+MICRO_BATCHING = {
+    "enabled": False,
+    "window_ms": 20,
+    "max_items": 8,
+    "agents": ["seo_optimizer", "brand_validator"]
+}
+
+# Shared LLM scheduler: priority lanes, tenant fair sharing and load shedding.
+# Requests carry optional "priority" (interactive|bulk|background) and "tenant" fields.
+# queue_limits: queued model calls at which new work of a class is rejected;
+# degrade_at: queued model calls at which new work of a class skips images and
+# runs a single iteration
+SCHEDULER = {
+    "enabled": True,
+    "max_concurrency": 16,
+    "default_priority": "interactive",
+    "queue_limits": {"interactive": 1000, "bulk": 200, "background": 50},
+    "degrade_at": {"bulk": 50, "background": 10},
+    "tenant_weights": {}
+}
+
+# Event-loop health monitor (opt-in): heartbeat interval, the loop lag that counts
+# as a slow callback, and how many slow callbacks to keep with stack samples
+LOOP_MONITOR = {
+    "enabled": False,
+    "interval_ms": 50,
+    "slow_threshold_ms": 100,
+    "max_events": 100
+}
+
 # Platform Settings
 PLATFORMS = {
     "linkedin": {
@@ -37,16 +89,61 @@ PLATFORMS = {
     }
 }
 
+# Multi-platform fan-out
+# variant_strategy: "batched" derives all variants in one LLM call,
+# "local" derives them with local transforms only
+FAN_OUT = {
+    "variant_strategy": "batched",
+    "platform_order": ["blog", "linkedin", "x"]  # longest form first; core content targets the first requested
+}
+
+# Result retention for long-running and batch processes
+# spill_iterations: write each completed iteration to ITERATIONS_DIR and keep
+# only a compact summary in memory; store_image_prompts: keep the full image
+# prompt in results (otherwise only its hash and length)
+RESULT_RETENTION = {
+    "spill_iterations": True,
+    "store_image_prompts": False
+}
+
 # File Paths
 BASE_DIR = Path(__file__).parent.parent
 OUTPUTS_DIR = BASE_DIR / "outputs"
 IMAGES_DIR = OUTPUTS_DIR / "images"
 CONTENT_DIR = OUTPUTS_DIR / "content"
+ITERATIONS_DIR = CONTENT_DIR / "iterations"
+
+# Ensure directories exist (on first write, not at import time)
+@lru_cache(maxsize=None)
+def ensure_output_dirs():
+    OUTPUTS_DIR.mkdir(exist_ok=True)
+    IMAGES_DIR.mkdir(exist_ok=True)
+    CONTENT_DIR.mkdir(exist_ok=True)
+    ITERATIONS_DIR.mkdir(exist_ok=True)
+
+# Record/replay of LLM traffic for offline load tests (see utils/cassette.py)
+# mode: "off", "record" (call the model and append every exchange to path) or
+# "replay" (answer from path without touching the network). Replayed latencies
+# are divided by time_scale (1 = real time, 0 = no waiting). run_log, when set,
+# gets one line per replayed call with the time it waited for a scheduler slot,
+# for comparing runs with `python -m utils.cassette compare`. Images are stored
+# as their size only unless store_images is set.
+CASSETTE = {
+    "mode": os.getenv("LLM_CASSETTE_MODE", "off"),
+    "path": os.getenv("LLM_CASSETTE_PATH", str(OUTPUTS_DIR / "cassettes" / "llm_cassette.jsonl")),
+    "time_scale": float(os.getenv("LLM_CASSETTE_TIME_SCALE", "1")),
+    "run_log": os.getenv("LLM_CASSETTE_RUN_LOG"),
+    "store_images": False
+}
 
-# Ensure directories exist
-OUTPUTS_DIR.mkdir(exist_ok=True)
-IMAGES_DIR.mkdir(exist_ok=True)
-CONTENT_DIR.mkdir(exist_ok=True)
+# Import-time budgets (cumulative ms, as reported by `python -X importtime`).
+# "cwd" is relative to BASE_DIR; checked with `python -m utils.import_budget`
+IMPORT_BUDGETS = [
+    {"module": "config.settings", "cwd": ".", "budget_ms": 30},
+    {"module": "agents", "cwd": ".", "budget_ms": 40},
+    {"module": "main", "cwd": ".", "budget_ms": 150},
+    {"module": "promptchaining", "cwd": "..", "budget_ms": 30}
+]
 
 # API Configuration
 def get_api_key():
@@ -1,7 +1,7 @@
 import asyncio
 import json
 from datetime import datetime
-from typing import Dict
+from typing import Dict, List
 
 # Import all agents
 from agents.router import ContentRouterAgent
@@ -18,6 +18,14 @@ from utils.helpers import (
     save_results_to_file, 
     print_results_summary
 )
+from utils.platform_validator import validate_platform_content
+from utils.brief_index import get_brief_index
+from utils.micro_batcher import get_micro_batcher
+from utils.retention import IterationStore, to_result_dict
+from utils.scheduler import admitted_request
+from utils.loop_monitor import create_loop_monitor, track_stage
+from utils.prompts import compact_json, get_prompt_stats
+from config.settings import BRIEF_REUSE, FAN_OUT, LOOP_MONITOR, MICRO_BATCHING, PLATFORMS
 
 class MultiModalContentPipeline:
     """
@@ -38,17 +46,45 @@ class MultiModalContentPipeline:
         }
         self.qa_agent = QualityAssuranceAgent()
         self.max_iterations = 2  # Prevent infinite loops
+        self.brief_index = get_brief_index() if BRIEF_REUSE["enabled"] else None
+        
+        # Share batchers across pipelines so concurrent requests are batched together
+        if MICRO_BATCHING["enabled"]:
+            for name in MICRO_BATCHING["agents"]:
+                if name in self.agents:
+                    self.agents[name].batcher = get_micro_batcher(name, self.agents[name])
     
     async def process_content_request(self, content_request: Dict) -> Dict:
         """Main pipeline orchestrator implementing all three patterns"""
         
+        # Admission control: overloaded bulk work is rejected or degraded up front
+        with admitted_request(content_request) as admission:
+            return await self._process_content_request(content_request, admission)
+    
+    async def _process_content_request(self, content_request: Dict, admission: Dict) -> Dict:
+        """Route, run agents in parallel and reflect until the content is approved"""
+        
         start_time = datetime.now()
         print(f"🚀 Starting Multi-Modal Content Pipeline at {start_time}")
         print(f"Request: {content_request}")
         
+        # Reuse approved outputs from a near-duplicate brief when one exists
+        seed_outputs = {}
+        match = self.brief_index.lookup(content_request) if self.brief_index else None
+        if match:
+            print(f"♻️ Near-duplicate brief found (similarity {match['similarity']})")
+            if BRIEF_REUSE["mode"] == "direct":
+                return self._reuse_prior_result(content_request, match, start_time)
+            seed_outputs["warm_start"] = match["final_outputs"].get("text_generator", {})
+        
         # PATTERN 1: ROUTING - Analyze request and determine execution strategy
+        # Serialize the request once; every agent prompt in this run reuses it
+        request_context = {"request_json": compact_json(content_request)}
+        
         print("\n📋 ROUTING PATTERN: Analyzing request...")
-        routing_decision = await self.router.execute(content_request)
+        with track_stage("routing"):
+            routing_decision = await self.router.execute(content_request, request_context)
+        max_iterations = self._apply_degradation(routing_decision, admission)
         print(f"Routing Decision: {json.dumps(routing_decision, indent=2)}")
         
         # Track all results
@@ -56,42 +92,181 @@ class MultiModalContentPipeline:
             "original_request": content_request,
             "routing_decision": routing_decision,
             "timestamp": start_time.isoformat(),
-            "iterations": []
+            "iterations": [],
+            "admission": admission
         }
+        if match:
+            all_results["brief_reuse"] = {"mode": "warm_start", "similarity": match["similarity"]}
         
-        # PATTERN 3: REFLECTION - Iterative improvement loop
-        iteration = 0
-        while iteration < self.max_iterations:
-            iteration += 1
-            print(f"\n🔄 ITERATION {iteration}")
-            
+        # Brand review needs the finished draft, so it runs after the parallel wave
+        wave_decision = dict(routing_decision)
+        wave_decision["required_agents"] = [
+            name for name in routing_decision.get("required_agents", []) if name != "brand_validator"
+        ]
+        
+        async def generate(previous_outputs: Dict) -> Dict:
             # PATTERN 2: PARALLELIZATION - Run required agents concurrently
             print(f"\n⚡ PARALLELIZATION PATTERN: Running agents concurrently...")
             agent_outputs = await self._run_required_agents(
                 content_request, 
-                routing_decision, 
-                all_results.get("previous_outputs", {})
+                wave_decision, 
+                {**previous_outputs, **request_context}
             )
             
-            # Collect all outputs for QA review
-            context_for_qa = {
-                "agent_outputs": agent_outputs,
-                "content_type": routing_decision.get("content_type"),
-                "iteration": iteration
-            }
+            # Fix mechanical platform violations locally so QA only sees real problems
+            text_output = agent_outputs.get("text_generator")
+            if text_output and "error" not in text_output:
+                with track_stage("platform_validation"):
+                    agent_outputs["text_generator"] = validate_platform_content(
+                        text_output, routing_decision.get("content_type")
+                    )
+                validation = agent_outputs["text_generator"]["platform_validation"]
+                for fix in validation["fixes_applied"]:
+                    print(f"🔧 Auto-fixed: {fix}")
+            
+            await self._run_brand_pass(
+                content_request, routing_decision, agent_outputs, agent_outputs.get("text_generator", {})
+            )
+            return agent_outputs
+        
+        await self._run_reflection_loop(
+            content_request, all_results, generate, max_iterations, request_context,
+            qa_content_type=routing_decision.get("content_type"),
+            previous_outputs=seed_outputs
+        )
+        
+        # Index approved results so similar future briefs can reuse them
+        if self.brief_index and all_results["qa_results"].get("approval_status") == "approved":
+            self.brief_index.add(content_request, all_results["final_outputs"], {
+                "routing_decision": routing_decision,
+                "qa_results": all_results["qa_results"]
+            })
+        
+        return self._save_and_report(all_results, content_request)
+    
+    async def process_fan_out_request(self, content_request: Dict, platforms: List[str]) -> Dict:
+        """Create content for several platforms from one request, sharing the expensive work"""
+        
+        with admitted_request(content_request) as admission:
+            return await self._process_fan_out_request(content_request, platforms, admission)
+    
+    async def _process_fan_out_request(self, content_request: Dict, platforms: List[str], admission: Dict) -> Dict:
+        """Generate core content once, derive platform variants and review them together"""
+        
+        start_time = datetime.now()
+        platforms = [platform for platform in dict.fromkeys(platforms) if platform in PLATFORMS]
+        if not platforms:
+            raise ValueError(f"No supported platforms requested; choose from {list(PLATFORMS)}")
+        
+        # Core content targets the longest-form platform; shorter ones are derived from it
+        order = FAN_OUT["platform_order"]
+        platforms.sort(key=lambda platform: order.index(platform) if platform in order else len(order))
+        primary, derived_platforms = platforms[0], platforms[1:]
+        
+        print(f"🚀 Starting Multi-Platform Fan-Out at {start_time}")
+        print(f"Request: {content_request}")
+        print(f"Platforms: {', '.join(platforms)} (core: {primary})")
+        
+        # PATTERN 1: ROUTING - Route once for the whole campaign
+        print("\n📋 ROUTING PATTERN: Analyzing request...")
+        # Every agent works from the request as aimed at the core platform; it is
+        # serialized once here and shared through the context
+        core_request = {**content_request, "platform": primary}
+        request_context = {"request_json": compact_json(core_request)}
+        with track_stage("routing"):
+            routing_decision = await self.router.execute(core_request, request_context)
+        routing_decision.update({"content_type": primary, "platform_specs": PLATFORMS[primary]})
+        max_iterations = self._apply_degradation(routing_decision, admission)
+        
+        all_results = {
+            "original_request": content_request,
+            "routing_decision": routing_decision,
+            "platforms": platforms,
+            "timestamp": start_time.isoformat(),
+            "iterations": [],
+            "admission": admission
+        }
+        
+        # Brand review runs once over every variant, after they exist
+        wave_decision = dict(routing_decision)
+        wave_decision["required_agents"] = [
+            name for name in routing_decision.get("required_agents", []) if name != "brand_validator"
+        ]
+        
+        async def generate(previous_outputs: Dict) -> Dict:
+            # PATTERN 2: PARALLELIZATION - Core text, image and SEO are generated once
+            print(f"\n⚡ PARALLELIZATION PATTERN: Running agents concurrently...")
+            agent_outputs = await self._run_required_agents(
+                core_request, wave_decision, {**previous_outputs, **request_context}
+            )
+            
+            core_text = agent_outputs.get("text_generator")
+            if core_text and "error" not in core_text:
+                core_text = validate_platform_content(core_text, primary)
+                agent_outputs["text_generator"] = core_text
+                
+                print(f"🔀 Deriving variants for: {', '.join(derived_platforms) or 'none'}")
+                with track_stage("variants"):
+                    variants = await self.agents["text_generator"].derive_variants(
+                        core_request, core_text, derived_platforms,
+                        use_llm=FAN_OUT["variant_strategy"] == "batched",
+                        context=request_context
+                    )
+                agent_outputs["variants"] = {primary: core_text, **variants}
+            
+            # Brand compliance for all variants in a single pass
+            await self._run_brand_pass(
+                core_request, routing_decision, agent_outputs, {"variants": agent_outputs.get("variants", {})}
+            )
+            return agent_outputs
+        
+        # PATTERN 3: REFLECTION - One QA review covers every variant
+        await self._run_reflection_loop(
+            core_request, all_results, generate, max_iterations, request_context,
+            qa_content_type=", ".join(platforms)
+        )
+        
+        return self._save_and_report(all_results, content_request)
+    
+    async def _run_reflection_loop(self, content_request: Dict, all_results: Dict, generate, max_iterations: int,
+                                   request_context: Dict, qa_content_type: str, previous_outputs: Dict = None):
+        """Generate, review and revise until QA approves or the iteration cap is reached
+        
+        generate(previous_outputs) produces one iteration's agent outputs. Final
+        outputs, QA results and the iteration count are written into all_results.
+        """
+        
+        # Completed iterations are spilled to disk; only summaries stay in memory
+        iteration_store = IterationStore(content_request)
+        iteration_records = []
+        previous_outputs = previous_outputs or {}
+        
+        # PATTERN 3: REFLECTION - Iterative improvement loop
+        iteration = 0
+        while iteration < max_iterations:
+            iteration += 1
+            print(f"\n🔄 ITERATION {iteration}")
+            
+            agent_outputs = await generate(previous_outputs)
             
             # PATTERN 3: REFLECTION - Quality review and feedback
             print(f"\n🔍 REFLECTION PATTERN: Quality assurance review...")
-            qa_results = await self.qa_agent.execute(content_request, context_for_qa)
+            with track_stage("qa"):
+                qa_results = await self.qa_agent.execute(content_request, {
+                    **request_context,
+                    "agent_outputs": agent_outputs,
+                    "content_type": qa_content_type,
+                    "iteration": iteration
+                })
             
             # Store iteration results
-            iteration_results = {
-                "iteration": iteration,
-                "agent_outputs": agent_outputs,
-                "qa_results": qa_results,
-                "timestamp": datetime.now().isoformat()
-            }
-            all_results["iterations"].append(iteration_results)
+            with track_stage("spill_iteration"):
+                iteration_records.append(await iteration_store.arecord({
+                    "iteration": iteration,
+                    "agent_outputs": agent_outputs,
+                    "qa_results": qa_results,
+                    "timestamp": datetime.now().isoformat()
+                }))
             
             # Check if we need another iteration
             should_iterate = await self.qa_agent.should_iterate(qa_results)
@@ -102,29 +277,82 @@ class MultiModalContentPipeline:
             if not should_iterate or qa_results.get('approval_status') == 'approved':
                 print("✅ Content approved - pipeline complete!")
                 break
-            elif iteration < self.max_iterations:
+            elif iteration < max_iterations:
                 print("🔄 Quality below threshold - preparing next iteration...")
-                all_results["previous_outputs"] = agent_outputs
+                previous_outputs = agent_outputs
             else:
                 print("⚠️ Max iterations reached - finalizing current version")
         
-        # Finalize results
-        final_iteration = all_results["iterations"][-1]
+        # Finalize results; callers get plain, JSON-serializable iteration records
         all_results.update({
-            "final_outputs": final_iteration["agent_outputs"],
-            "qa_results": final_iteration["qa_results"],
+            "iterations": [to_result_dict(record) for record in iteration_records],
+            "final_outputs": agent_outputs,
+            "qa_results": qa_results,
             "total_iterations": iteration,
             "completion_time": datetime.now().isoformat()
         })
+    
+    def _save_and_report(self, all_results: Dict, content_request: Dict) -> Dict:
+        """Save the run's results and print the summary"""
         
-        # Save and display results
-        file_path = save_results_to_file(all_results, content_request)
+        with track_stage("save_results"):
+            file_path = save_results_to_file(all_results, content_request)
         all_results["files_saved"] = file_path
         
         print_results_summary(all_results)
         
         return all_results
     
+    async def _run_brand_pass(self, content_request: Dict, routing_decision: Dict, agent_outputs: Dict, text_content: Dict):
+        """Validate the finished text, SEO and image outputs against the brand guidelines"""
+        
+        if "brand_validator" not in routing_decision.get("required_agents", []):
+            return
+        
+        brand_context = create_agent_context(routing_decision, {
+            "text_content": text_content,
+            "seo_content": agent_outputs.get("seo_optimizer", {}),
+            "image_content": agent_outputs.get("image_creator", {})
+        })
+        with track_stage("brand_validation"):
+            agent_outputs["brand_validator"] = await self.agents["brand_validator"].execute(
+                content_request, brand_context
+            )
+    
+    def _apply_degradation(self, routing_decision: Dict, admission: Dict) -> int:
+        """Trim work for requests admitted in degraded mode; returns the iteration cap"""
+        
+        if not admission["degraded"]:
+            return self.max_iterations
+        
+        print(f"⚠️ LLM pool overloaded - running {admission['priority']} request degraded (no images, single iteration)")
+        routing_decision["required_agents"] = [
+            name for name in routing_decision.get("required_agents", []) if name != "image_creator"
+        ]
+        routing_decision["requires_images"] = False
+        return 1
+    
+    def _reuse_prior_result(self, content_request: Dict, match: Dict, start_time: datetime) -> Dict:
+        """Answer a request directly with the approved outputs of a near-duplicate brief"""
+        
+        all_results = {
+            "original_request": content_request,
+            "routing_decision": match["metadata"].get("routing_decision", {}),
+            "timestamp": start_time.isoformat(),
+            "iterations": [],
+            "brief_reuse": {
+                "mode": "direct",
+                "similarity": match["similarity"],
+                "matched_request": match["request"]
+            },
+            "final_outputs": match["final_outputs"],
+            "qa_results": match["metadata"].get("qa_results", {}),
+            "total_iterations": 0,
+            "completion_time": datetime.now().isoformat()
+        }
+        
+        return self._save_and_report(all_results, content_request)
+    
     async def _run_required_agents(self, content_request: Dict, routing_decision: Dict, previous_outputs: Dict) -> Dict:
         """Run required agents based on routing decision"""
         
@@ -150,32 +378,45 @@ class MultiModalContentPipeline:
                     context[f"{agent_name}_content"] = result
             return results
 
+# Example content request
+SAMPLE_REQUEST = {
+    "topic": "AI in Healthcare: Transforming Patient Care",
+    "target_audience": "healthcare professionals",
+    "platform": "linkedin",
+    "content_type": "article",
+    "include_images": True,
+    "tone": "professional, informative",
+    "key_points": [
+        "AI diagnostics accuracy",
+        "Patient data privacy",
+        "Cost reduction benefits",
+        "Implementation challenges"
+    ]
+}
+
 # Example usage and test function
 async def main():
     """Example usage of the Multi-Modal Content Pipeline"""
     
-    # Example content request
-    sample_request = {
-        "topic": "AI in Healthcare: Transforming Patient Care",
-        "target_audience": "healthcare professionals",
-        "platform": "linkedin",
-        "content_type": "article",
-        "include_images": True,
-        "tone": "professional, informative",
-        "key_points": [
-            "AI diagnostics accuracy",
-            "Patient data privacy",
-            "Cost reduction benefits",
-            "Implementation challenges"
-        ]
-    }
+    # Optionally watch the event loop for blocking work while the pipeline runs
+    monitor = create_loop_monitor() if LOOP_MONITOR["enabled"] else None
+    if monitor:
+        monitor.start()
     
     # Create and run pipeline
     pipeline = MultiModalContentPipeline()
-    results = await pipeline.process_content_request(sample_request)
+    results = await pipeline.process_content_request(SAMPLE_REQUEST)
+    
+    if monitor:
+        await monitor.stop()
+        print(monitor.report())
     
     print(f"\n🎉 Pipeline completed successfully!")
     print(f"Results saved to: {results.get('files_saved')}")
+    
+    print("\nPrompt sizes per agent:")
+    for name, stats in get_prompt_stats().items():
+        print(f"  {name}: {stats['calls']} calls, avg {stats['avg_bytes']} bytes (~{stats['avg_tokens_est']} tokens), max {stats['max_bytes']} bytes")
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,143 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+from config.settings import BRAND_GUIDELINES
+
+# Words are runs of letters/digits, so "low-cost", "low cost" and "Low Cost" all
+# tokenize the same way and every match lands on a word boundary
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+# Only fields that get published are scanned. Everything else an agent returns
+# (SEO advice, analysis, metadata) may mention a word without the brand using it.
+_TEXT_FIELDS = ("title", "content", "summary", "hashtags", "call_to_action", "thread")
+_SEO_FIELDS = ("optimized_title", "meta_description", "optimized_hashtags")
+
+def tokenize(text: str) -> List[str]:
+    # Split text into case-folded word tokens
+    return _TOKEN_RE.findall(text.casefold())
+
+def _flatten_strings(value, parts: List[str]):
+    if isinstance(value, str):
+        parts.append(value)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _flatten_strings(item, parts)
+
+def collect_scannable_text(text_content: Dict, seo_content: Dict = None) -> str:
+    # Join the published fields of the text output (and of each fan-out variant)
+    # and of the SEO output into one block of text
+
+    parts = []
+    text_outputs = [text_content or {}]
+    text_outputs.extend(
+        variant for variant in (text_content or {}).get("variants", {}).values() if isinstance(variant, dict)
+    )
+    for output in text_outputs:
+        for field in _TEXT_FIELDS:
+            _flatten_strings(output.get(field), parts)
+    for field in _SEO_FIELDS:
+        _flatten_strings((seo_content or {}).get(field), parts)
+
+    return "\n".join(parts)
+
+class BrandScanResult:
+    # Outcome of a local scan, in the shape of the validator's keyword_analysis block
+
+    __slots__ = ("brand_keywords_used", "missing_keywords", "prohibited_words_found", "scanned_tokens")
+
+    def __init__(self, brand_keywords_used: List[str], missing_keywords: List[str],
+                 prohibited_words_found: List[str], scanned_tokens: int):
+        self.brand_keywords_used = brand_keywords_used
+        self.missing_keywords = missing_keywords
+        self.prohibited_words_found = prohibited_words_found
+        self.scanned_tokens = scanned_tokens
+
+    @property
+    def has_violations(self) -> bool:
+        return bool(self.prohibited_words_found)
+
+    @property
+    def has_content(self) -> bool:
+        return self.scanned_tokens > 0
+
+    @property
+    def is_conclusive(self) -> bool:
+        # A scan settles the keyword checks on its own when it found a prohibited
+        # word, or when it saw real content that uses every brand keyword
+        if self.has_violations:
+            return True
+        return self.has_content and not self.missing_keywords
+
+    def keyword_analysis(self) -> Dict:
+        return {
+            "content_scanned": self.has_content,
+            "brand_keywords_used": list(self.brand_keywords_used),
+            "missing_keywords": list(self.missing_keywords),
+            "prohibited_words_found": list(self.prohibited_words_found)
+        }
+
+class BrandScanner:
+    # Multi-pattern matcher compiled once from brand keyword and avoid-word lists.
+    # Terms are indexed by their first token, so a scan is a single pass over the
+    # text whose cost does not grow with the number of terms.
+
+    def __init__(self, keywords: Iterable[str], avoid_words: Iterable[str]):
+        self.keywords = self._dedupe(keywords)
+        self.avoid_words = self._dedupe(avoid_words)
+        self._index: Dict[str, List[Tuple[Tuple[str, ...], int, str]]] = {}
+
+        for kind, terms in ((0, self.keywords), (1, self.avoid_words)):
+            for term in terms:
+                tokens = tuple(tokenize(term))
+                if tokens:
+                    self._index.setdefault(tokens[0], []).append((tokens, kind, term))
+
+    @classmethod
+    def from_guidelines(cls, guidelines: Dict) -> "BrandScanner":
+        return cls(guidelines.get("keywords", []), guidelines.get("avoid_words", []))
+
+    def scan(self, text: str) -> BrandScanResult:
+        # Find every brand keyword and prohibited term present in the text
+
+        tokens = tokenize(text)
+        found = (set(), set())
+
+        for position, token in enumerate(tokens):
+            for term_tokens, kind, term in self._index.get(token, ()):
+                size = len(term_tokens)
+                if size == 1 or tuple(tokens[position:position + size]) == term_tokens:
+                    found[kind].add(term)
+
+        keywords_found, avoid_found = found
+        return BrandScanResult(
+            brand_keywords_used=[term for term in self.keywords if term in keywords_found],
+            # With no content there is nothing to be missing from
+            missing_keywords=[term for term in self.keywords if term not in keywords_found] if tokens else [],
+            prohibited_words_found=[term for term in self.avoid_words if term in avoid_found],
+            scanned_tokens=len(tokens)
+        )
+
+    @staticmethod
+    def _dedupe(terms: Iterable[str]) -> List[str]:
+        # Drop blanks and case-insensitive duplicates while keeping list order
+        seen = set()
+        unique = []
+        for term in terms:
+            key = tuple(tokenize(term))
+            if key and key not in seen:
+                seen.add(key)
+                unique.append(term)
+        return unique
+
+@lru_cache(maxsize=64)
+def compile_brand_scanner(keywords: Tuple[str, ...], avoid_words: Tuple[str, ...]) -> BrandScanner:
+    # Compile (and cache) a scanner for one brand's term lists
+    return BrandScanner(keywords, avoid_words)
+
+def get_brand_scanner(guidelines: Dict = None) -> BrandScanner:
+    # Scanner for the given guidelines, defaulting to the configured brand
+    guidelines = guidelines or BRAND_GUIDELINES
+    return compile_brand_scanner(
+        tuple(guidelines.get("keywords", [])),
+        tuple(guidelines.get("avoid_words", []))
+    )
@@ -0,0 +1,252 @@
+import hashlib
+import json
+import re
+import time
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Tuple
+from config.settings import BRIEF_REUSE, CONTENT_DIR
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+# Fields that must match exactly for a prior output to be reusable at all
+_PARTITION_FIELDS = ("platform", "include_images")
+
+def _tokens(value) -> List[str]:
+    return _TOKEN_RE.findall(str(value).casefold())
+
+def brief_features(content_request: Dict) -> FrozenSet[str]:
+    # Normalize a brief into an order- and case-insensitive feature set.
+    # Each field contributes its words, except key points: each point is one
+    # feature (its sorted words), so swapping a single point changes exactly two
+    # features instead of every word it contains.
+
+    features = set()
+    for field, value in content_request.items():
+        if field in _PARTITION_FIELDS:
+            continue
+        items = value if isinstance(value, (list, tuple)) else [value]
+        for item in items:
+            tokens = _tokens(item)
+            if field != "key_points":
+                features.update(f"{field}:{token}" for token in tokens)
+            elif tokens:
+                features.add("key_point:" + " ".join(sorted(tokens)))
+    return frozenset(features)
+
+def _partition_key(content_request: Dict) -> Tuple:
+    return tuple(str(content_request.get(field)).casefold() for field in _PARTITION_FIELDS)
+
+@lru_cache(maxsize=65536)
+def _feature_hashes(feature: str, num_perm: int, seed: int) -> Tuple[int, ...]:
+    # num_perm independent 64-bit hashes of one feature, eight per salted blake2b digest.
+    # Features repeat heavily across briefs, so these are cached.
+
+    data = feature.encode("utf-8")
+    values = []
+    for block in range((num_perm + 7) // 8):
+        salt = seed.to_bytes(8, "big") + block.to_bytes(8, "big")
+        digest = hashlib.blake2b(data, digest_size=64, salt=salt).digest()
+        values.extend(int.from_bytes(digest[i:i + 8], "big") for i in range(0, 64, 8))
+    return tuple(values[:num_perm])
+
+class BriefIndex:
+    # MinHash/LSH similarity index over past content requests and their approved outputs
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 16,
+                 max_entries: int = 10000, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        self.seed = seed
+
+        # Candidates sharing fewer bands than this are too unlikely to reach the
+        # threshold to be worth an exact comparison (half the expected band hits)
+        self.min_band_hits = max(1, int(bands * threshold ** self.rows / 2))
+
+        self._entries: "OrderedDict[int, Dict]" = OrderedDict()
+        self._buckets: Dict[Tuple, List[int]] = {}
+        self._next_id = 0
+        self.stats = {"lookups": 0, "hits": 0, "misses": 0, "lookup_seconds": 0.0}
+
+    def _signature(self, features: FrozenSet[str]) -> Tuple[int, ...]:
+        # MinHash: per hash function, the minimum value over all features
+        vectors = [_feature_hashes(feature, self.num_perm, self.seed) for feature in features]
+        if not vectors:
+            return (0,) * self.num_perm
+        return tuple(map(min, zip(*vectors)))
+
+    def _bucket_keys(self, partition: Tuple, signature: Tuple[int, ...]) -> List[Tuple]:
+        return [
+            (partition, band, signature[band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+    def add(self, content_request: Dict, final_outputs: Dict, metadata: Dict = None):
+        # Index an approved result so similar future briefs can reuse it
+
+        features = brief_features(content_request)
+        keys = self._bucket_keys(_partition_key(content_request), self._signature(features))
+
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = {
+            "request": content_request,
+            "final_outputs": final_outputs,
+            "metadata": metadata or {},
+            "features": features,
+            "bucket_keys": keys
+        }
+        for key in keys:
+            self._buckets.setdefault(key, []).append(entry_id)
+
+        while len(self._entries) > self.max_entries:
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        entry_id, entry = self._entries.popitem(last=False)
+        for key in entry["bucket_keys"]:
+            bucket = self._buckets.get(key)
+            if bucket:
+                bucket.remove(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def lookup(self, content_request: Dict) -> Optional[Dict]:
+        # Return the most similar prior result at or above the threshold, if any
+
+        started = time.perf_counter()
+        features = brief_features(content_request)
+        keys = self._bucket_keys(_partition_key(content_request), self._signature(features))
+
+        band_hits = Counter()
+        for key in keys:
+            band_hits.update(self._buckets.get(key, ()))
+
+        best_match = None
+        best_similarity = self.threshold
+        for entry_id, hits in band_hits.items():
+            if hits < self.min_band_hits:
+                continue
+            entry = self._entries[entry_id]
+            shared = len(features & entry["features"])
+            union = len(features) + len(entry["features"]) - shared
+            similarity = shared / union if union else 1.0
+            if similarity >= best_similarity:
+                best_similarity = similarity
+                best_match = entry
+
+        self.stats["lookups"] += 1
+        self.stats["lookup_seconds"] += time.perf_counter() - started
+        if best_match is None:
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        return {
+            "similarity": round(best_similarity, 4),
+            "request": best_match["request"],
+            "final_outputs": best_match["final_outputs"],
+            "metadata": best_match["metadata"]
+        }
+
+    def load_saved_results(self, directory: Path) -> int:
+        # Seed the index from approved *_results.json files in the results store
+
+        loaded = 0
+        for path in sorted(Path(directory).glob("*_results.json")):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    results = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if results.get("qa_results", {}).get("approval_status") != "approved":
+                continue
+            if "original_request" not in results or "final_outputs" not in results:
+                continue
+            # Same metadata as results indexed at runtime, so direct reuse can report them
+            self.add(results["original_request"], results["final_outputs"], {
+                "routing_decision": results.get("routing_decision", {}),
+                "qa_results": results["qa_results"],
+                "source": str(path)
+            })
+            loaded += 1
+        return loaded
+
+    def metrics(self) -> Dict:
+        # Hit-rate and latency metrics for the index
+
+        lookups = self.stats["lookups"]
+        return {
+            "entries": len(self._entries),
+            "lookups": lookups,
+            "hits": self.stats["hits"],
+            "misses": self.stats["misses"],
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            "avg_lookup_ms": 1000 * self.stats["lookup_seconds"] / lookups if lookups else 0.0
+        }
+
+_brief_index = None
+
+def get_brief_index() -> BriefIndex:
+    # Process-wide index built from BRIEF_REUSE settings, shared by all pipelines
+    global _brief_index
+    if _brief_index is None:
+        _brief_index = BriefIndex(
+            threshold=BRIEF_REUSE["threshold"],
+            num_perm=BRIEF_REUSE["num_perm"],
+            bands=BRIEF_REUSE["bands"],
+            max_entries=BRIEF_REUSE["max_entries"]
+        )
+        if BRIEF_REUSE["load_saved_results"] and CONTENT_DIR.exists():
+            _brief_index.load_saved_results(CONTENT_DIR)
+    return _brief_index
+
+if __name__ == "__main__":
+    # python -m utils.brief_index
+    # Check that the kinds of near-duplicate a brief typically has still match the
+    # sample brief at the configured threshold, and that a different brief does not
+    from main import SAMPLE_REQUEST
+
+    index = BriefIndex(
+        threshold=BRIEF_REUSE["threshold"],
+        num_perm=BRIEF_REUSE["num_perm"],
+        bands=BRIEF_REUSE["bands"]
+    )
+    index.add(SAMPLE_REQUEST, {"text_generator": {}})
+
+    cases = {
+        "word order and casing": ({
+            **SAMPLE_REQUEST,
+            "topic": SAMPLE_REQUEST["topic"].upper(),
+            "key_points": list(reversed(SAMPLE_REQUEST["key_points"]))
+        }, True),
+        "different topic and points": ({
+            **SAMPLE_REQUEST,
+            "topic": "Blockchain in Finance: Faster Cross-Border Payments",
+            "key_points": ["Settlement speed", "Regulatory compliance"]
+        }, False)
+    }
+    for position in range(len(SAMPLE_REQUEST["key_points"])):
+        key_points = list(SAMPLE_REQUEST["key_points"])
+        key_points[position] = "Regulatory approval timelines"
+        cases[f"key point {position + 1} swapped"] = ({**SAMPLE_REQUEST, "key_points": key_points}, True)
+
+    failures = 0
+    for name, (request, should_match) in cases.items():
+        features = brief_features(request)
+        reference = brief_features(SAMPLE_REQUEST)
+        similarity = len(features & reference) / len(features | reference)
+        matched = index.lookup(request) is not None
+        ok = matched == should_match
+        failures += not ok
+        print(f"{'✓' if ok else '✗'} {name}: similarity {similarity:.3f}, {'match' if matched else 'no match'}")
+
+    if failures:
+        raise SystemExit(f"{failures} case(s) did not behave as expected at threshold {index.threshold}")
@@ -0,0 +1,254 @@
+import asyncio
+import base64
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Deque, Dict, List, Optional
+from config.settings import CASSETTE
+
+# Cassette format: one JSON object per line, one line per model call.
+#   seq, t_ms          - call order and start time relative to the start of the run
+#   label, model       - calling agent (or chain step) and model name
+#   key, prompt_chars  - blake2b hash of [model, prompt] and the prompt's length
+#   latency_ms         - time the model took to answer
+#   prompt_tokens, response_tokens
+#   text, images       - the response; images as {"mime_type", "size"[, "data"]}
+# promptchaining.py writes the same format for LangChain calls.
+
+# Smallest valid PNG (1x1, transparent), served for images recorded by size only
+PLACEHOLDER_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+)
+
+class CassetteMissError(LookupError):
+    # Raised in replay when the cassette has nothing recorded for a call
+    pass
+
+def prompt_key(model: str, contents) -> str:
+    payload = json.dumps([model, contents], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+def _response_parts(response):
+    try:
+        return response.candidates[0].content.parts
+    except (AttributeError, IndexError):
+        return []
+
+def _replay_response(entry: Dict):
+    # Rebuild the parts of a Gemini response the agents read
+    parts = []
+    if entry.get("text"):
+        parts.append(SimpleNamespace(text=entry["text"], inline_data=None))
+    for image in entry.get("images", []):
+        data = base64.b64decode(image["data"]) if "data" in image else PLACEHOLDER_PNG
+        parts.append(SimpleNamespace(text="", inline_data=SimpleNamespace(mime_type=image["mime_type"], data=data)))
+
+    return SimpleNamespace(
+        text=entry.get("text", ""),
+        candidates=[SimpleNamespace(content=SimpleNamespace(parts=parts))],
+        usage_metadata=SimpleNamespace(
+            prompt_token_count=entry.get("prompt_tokens"),
+            candidates_token_count=entry.get("response_tokens")
+        )
+    )
+
+def load_cassette(path) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+class Cassette:
+    # Records model calls to a JSONL cassette, or answers them from one.
+    # Replay matches calls by prompt hash, falling back to the next call recorded
+    # for the same label, and cycles through repeats so a short recording can
+    # drive a long load test.
+
+    def __init__(self, path, mode: str, time_scale: float = 1.0, run_log=None, store_images: bool = False):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+
+        self.path = Path(path)
+        self.mode = mode
+        self.time_scale = time_scale
+        self.run_log = Path(run_log) if run_log else None
+        self.store_images = store_images
+
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._started = time.perf_counter()
+        self.stats = {"calls": 0, "hits": 0, "label_fallbacks": 0, "misses": 0}
+
+        self._by_key: Dict[str, Deque[Dict]] = defaultdict(deque)
+        self._by_label: Dict[str, Deque[Dict]] = defaultdict(deque)
+        if mode == "replay":
+            for entry in load_cassette(self.path):
+                self._by_key[entry["key"]].append(entry)
+                self._by_label[entry["label"]].append(entry)
+
+    async def acall(self, model: str, label: str, contents, call, requested_at: float = None):
+        # Run one model call through the cassette; call() makes the live request
+        key = prompt_key(model, contents)
+        started = time.perf_counter()
+
+        if self.mode == "replay":
+            entry = self._next_entry(key, label)
+            delay = self._replay_delay(entry)
+            if delay:
+                await asyncio.sleep(delay)
+            self._log_replay(entry, label, started, requested_at)
+            return _replay_response(entry)
+
+        response = await call()
+        self._record(model, label, key, contents, response, started)
+        return response
+
+    def _next_entry(self, key: str, label: str) -> Dict:
+        self.stats["calls"] += 1
+        queue = self._by_key.get(key)
+        if queue:
+            self.stats["hits"] += 1
+        else:
+            queue = self._by_label.get(label)
+            if not queue:
+                self.stats["misses"] += 1
+                raise CassetteMissError(f"No recorded call for {label} (prompt {key}) in {self.path}")
+            self.stats["label_fallbacks"] += 1
+
+        entry = queue.popleft()
+        queue.append(entry)
+        return entry
+
+    def _replay_delay(self, entry: Dict) -> float:
+        if self.time_scale <= 0:
+            return 0.0
+        return entry.get("latency_ms", 0) / 1000 / self.time_scale
+
+    def _record(self, model: str, label: str, key: str, contents, response, started: float):
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        text_parts, images = [], []
+        for part in _response_parts(response):
+            if getattr(part, "text", None):
+                text_parts.append(part.text)
+            inline = getattr(part, "inline_data", None)
+            if inline and getattr(inline, "data", None):
+                image = {"mime_type": inline.mime_type, "size": len(inline.data)}
+                if self.store_images:
+                    image["data"] = base64.b64encode(inline.data).decode("ascii")
+                images.append(image)
+
+        usage = getattr(response, "usage_metadata", None)
+        entry = {
+            "label": label,
+            "model": model,
+            "key": key,
+            "prompt_chars": len(contents) if isinstance(contents, str) else sum(len(str(item)) for item in contents),
+            "latency_ms": round(latency_ms, 1),
+            "prompt_tokens": getattr(usage, "prompt_token_count", None),
+            "response_tokens": getattr(usage, "candidates_token_count", None),
+            "text": "".join(text_parts)
+        }
+        if images:
+            entry["images"] = images
+        self._append(self.path, entry, started)
+
+    def _log_replay(self, entry: Dict, label: str, started: float, requested_at: Optional[float]):
+        if self.run_log is None:
+            return
+        observed = {key: value for key, value in entry.items() if key not in ("seq", "t_ms")}
+        observed["label"] = label
+        observed["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        observed["wait_ms"] = round((started - requested_at) * 1000, 1) if requested_at else 0.0
+        self._append(self.run_log, observed, started)
+
+    def _append(self, path: Path, entry: Dict, started: float):
+        with self._lock:
+            self._seq += 1
+            line = {"seq": self._seq, "t_ms": round((started - self._started) * 1000, 1), **entry}
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(line, ensure_ascii=False, separators=(",", ":")))
+                f.write("\n")
+
+_cassette = None
+
+def get_cassette() -> Cassette:
+    # Process-wide cassette built from the CASSETTE settings
+    global _cassette
+    if _cassette is None:
+        _cassette = Cassette(
+            CASSETTE["path"],
+            CASSETTE["mode"],
+            time_scale=CASSETTE["time_scale"],
+            run_log=CASSETTE["run_log"],
+            store_images=CASSETTE["store_images"]
+        )
+    return _cassette
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def summarize(entries: List[Dict]) -> Dict:
+    latencies = [entry.get("latency_ms", 0) for entry in entries]
+    return {
+        "calls": len(entries),
+        "latency_p50_ms": _percentile(latencies, 0.50),
+        "latency_p99_ms": _percentile(latencies, 0.99),
+        "wait_p99_ms": _percentile([entry.get("wait_ms", 0) for entry in entries], 0.99),
+        "response_chars": sum(len(entry.get("text", "")) for entry in entries),
+        "response_tokens": sum(entry.get("response_tokens") or 0 for entry in entries)
+    }
+
+def compare_runs(baseline: List[Dict], candidate: List[Dict]) -> Dict:
+    # Pair calls one-to-one by prompt hash and occurrence, then compare latency and responses
+
+    def occurrences(entries):
+        seen = defaultdict(int)
+        paired = {}
+        for entry in entries:
+            paired[(entry["key"], seen[entry["key"]])] = entry
+            seen[entry["key"]] += 1
+        return paired
+
+    base, cand = occurrences(baseline), occurrences(candidate)
+    matched = [pair for pair in base if pair in cand]
+
+    by_label = defaultdict(list)
+    for pair in matched:
+        by_label[base[pair]["label"]].append(cand[pair].get("latency_ms", 0) - base[pair].get("latency_ms", 0))
+
+    return {
+        "baseline": summarize(baseline),
+        "candidate": summarize(candidate),
+        "matched": len(matched),
+        "only_in_baseline": len(base) - len(matched),
+        "only_in_candidate": len(cand) - len(matched),
+        "changed_responses": sum(1 for pair in matched if base[pair].get("text") != cand[pair].get("text")),
+        "latency_delta_ms_by_label": {
+            label: round(sum(deltas) / len(deltas), 1) for label, deltas in sorted(by_label.items())
+        }
+    }
+
+if __name__ == "__main__":
+    # python -m utils.cassette summary outputs/cassettes/llm_cassette.jsonl
+    # python -m utils.cassette compare baseline.jsonl candidate.jsonl
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect and compare LLM cassettes and replay run logs")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("summary").add_argument("path")
+    compare = subcommands.add_parser("compare")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        print(json.dumps(summarize(load_cassette(args.path)), indent=2))
+    else:
+        print(json.dumps(compare_runs(load_cassette(args.baseline), load_cassette(args.candidate)), indent=2))
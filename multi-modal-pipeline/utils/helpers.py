@@ -3,7 +3,7 @@ import asyncio
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any
-from config.settings import CONTENT_DIR
+from config.settings import CONTENT_DIR, ensure_output_dirs
 
 def save_results_to_file(results: Dict, content_request: Dict) -> str:
     # Save final results to JSON file
@@ -12,6 +12,7 @@ def save_results_to_file(results: Dict, content_request: Dict) -> str:
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"{topic}_{timestamp}_results.json"
     
+    ensure_output_dirs()
     file_path = CONTENT_DIR / filename
     
     with open(file_path, 'w', encoding='utf-8') as f:
@@ -31,6 +32,11 @@ def print_results_summary(results: Dict):
     print(f"Platform: {results.get('routing_decision', {}).get('content_type', 'N/A')}")
     print(f"Timestamp: {results.get('timestamp', 'N/A')}")
     
+    # Near-duplicate reuse
+    brief_reuse = results.get('brief_reuse')
+    if brief_reuse:
+        print(f"Reused prior output: {brief_reuse['mode']} (similarity {brief_reuse['similarity']})")
+    
     # Quality scores
     qa_results = results.get('qa_results', {})
     print(f"\nOverall Quality Score: {qa_results.get('overall_quality_score', 'N/A')}/10")
@@ -42,6 +48,15 @@ def print_results_summary(results: Dict):
         print(f"\nTitle: {text_content.get('title', 'N/A')}")
         print(f"Word Count: {text_content.get('word_count', 'N/A')}")
     
+    # Platform variants (fan-out runs)
+    variants = results.get('final_outputs', {}).get('variants', {})
+    for platform, variant in variants.items():
+        validation = variant.get('platform_validation', {})
+        status = "✓" if validation.get('passed', True) else "✗"
+        parts = validation.get('part_char_counts', [])
+        thread_note = f" in {len(parts)} parts" if len(parts) > 1 else ""
+        print(f"  {status} {platform}: {validation.get('char_count', 'N/A')} chars{thread_note}, {validation.get('word_count', 'N/A')} words")
+    
     # Image info
     image_content = results.get('agent_outputs', {}).get('image_creator', {})
     if image_content and image_content.get('success'):
@@ -0,0 +1,55 @@
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+from config.settings import BASE_DIR, IMPORT_BUDGETS
+
+def measure_import_time(module: str, cwd: Path, repeat: int = 5) -> float:
+    # Cumulative import time of a module in ms, best of several fresh interpreters
+
+    best = None
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=cwd, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{completed.stderr.strip()}")
+
+        # Lines look like "import time:  self [us] | cumulative | imported package"
+        cumulative_us = None
+        for line in completed.stderr.splitlines():
+            if not line.startswith("import time:"):
+                continue
+            fields = line[len("import time:"):].split("|")
+            if len(fields) == 3 and fields[2].strip() == module:
+                cumulative_us = int(fields[1])
+
+        if cumulative_us is None:
+            raise RuntimeError(f"No importtime entry found for {module}")
+
+        elapsed_ms = cumulative_us / 1000
+        best = elapsed_ms if best is None else min(best, elapsed_ms)
+
+    return best
+
+def check_import_budgets(budgets: List[Dict] = None) -> List[Dict]:
+    # Measure every budgeted module and report whether it fits its budget
+
+    report = []
+    for entry in budgets or IMPORT_BUDGETS:
+        elapsed_ms = measure_import_time(entry["module"], BASE_DIR / entry["cwd"])
+        report.append({
+            "module": entry["module"],
+            "import_ms": round(elapsed_ms, 2),
+            "budget_ms": entry["budget_ms"],
+            "within_budget": elapsed_ms <= entry["budget_ms"]
+        })
+    return report
+
+if __name__ == "__main__":
+    results = check_import_budgets()
+    for result in results:
+        status = "✓" if result["within_budget"] else "✗"
+        print(f"{status} {result['module']}: {result['import_ms']}ms (budget {result['budget_ms']}ms)")
+    sys.exit(0 if all(result["within_budget"] for result in results) else 1)
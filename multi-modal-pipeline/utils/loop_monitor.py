@@ -0,0 +1,195 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from config.settings import BASE_DIR, LOOP_MONITOR
+
+# Only frames from this project are used to say where blocking work happened
+_PROJECT_ROOT = str(BASE_DIR.parent)
+
+_active_monitor: Optional["LoopMonitor"] = None
+
+class SlowCallback:
+    # One stretch of time during which the event loop could not run anything else
+
+    __slots__ = ("duration_ms", "task", "stage", "location", "stack", "timestamp")
+
+    def __init__(self, task: str, stage: Optional[str], location: Optional[str], stack: List[str]):
+        self.duration_ms = None
+        self.task = task
+        self.stage = stage
+        self.location = location
+        self.stack = stack
+        self.timestamp = time.time()
+
+    def to_dict(self) -> Dict:
+        return {
+            "duration_ms": self.duration_ms,
+            "task": self.task,
+            "stage": self.stage,
+            "location": self.location,
+            "stack": self.stack
+        }
+
+class LoopMonitor:
+    # Opt-in event-loop health monitor. A heartbeat task measures scheduling lag;
+    # a watchdog thread notices when the heartbeat stalls and samples the loop
+    # thread's stack while the blocking work is still running, attributing it to
+    # the running task, its pipeline stage and the innermost project frame.
+
+    def __init__(self, interval_ms: float = 50, slow_threshold_ms: float = 100, max_events: int = 100):
+        self.interval = interval_ms / 1000
+        self.slow_threshold = slow_threshold_ms / 1000
+        self.lag_samples = deque(maxlen=10000)
+        self.slow_callbacks = deque(maxlen=max_events)
+        self.slow_callback_count = 0
+
+        self._loop = None
+        self._loop_thread_id = None
+        self._heartbeat_task = None
+        self._watchdog = None
+        self._stopping = threading.Event()
+        self._last_beat = time.monotonic()
+        self._pending_event: Optional[SlowCallback] = None
+        self._task_stages = weakref.WeakKeyDictionary()
+
+    def start(self):
+        # Start monitoring the running event loop
+        global _active_monitor
+
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopping.clear()
+
+        self._heartbeat_task = self._loop.create_task(self._heartbeat(), name="loop_monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor-watchdog", daemon=True)
+        self._watchdog.start()
+        _active_monitor = self
+
+    async def stop(self):
+        global _active_monitor
+
+        self._stopping.set()
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog:
+            self._watchdog.join(timeout=1)
+        if _active_monitor is self:
+            _active_monitor = None
+
+    async def _heartbeat(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - started - self.interval)
+            self._last_beat = now
+            self.lag_samples.append(lag)
+
+            if lag >= self.slow_threshold:
+                # Close the stall the watchdog sampled, or record one it was too slow to catch
+                event = self._pending_event or SlowCallback("unknown", None, None, [])
+                self._pending_event = None
+                event.duration_ms = round(lag * 1000, 1)
+                self.slow_callbacks.append(event)
+                self.slow_callback_count += 1
+            else:
+                self._pending_event = None
+
+    def _watch(self):
+        # Watchdog thread: sample the loop thread once per stall
+        while not self._stopping.wait(self.slow_threshold / 4):
+            stalled_for = time.monotonic() - self._last_beat
+            if stalled_for >= self.interval + self.slow_threshold and self._pending_event is None:
+                self._pending_event = self._sample()
+
+    def _sample(self) -> SlowCallback:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.format_stack(frame)[-12:] if frame else []
+
+        location = None
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if filename.startswith(_PROJECT_ROOT) and "site-packages" not in filename and filename != __file__:
+                location = f"{filename[len(_PROJECT_ROOT) + 1:]}:{frame.f_lineno} in {frame.f_code.co_name}"
+                break
+            frame = frame.f_back
+
+        # current_task() is a plain dict lookup, safe enough to read from this thread
+        task = asyncio.current_task(self._loop)
+        task_name = task.get_name() if task else "callback"
+        stage = self._task_stages.get(task) if task else None
+
+        return SlowCallback(task_name, stage, location, [line.rstrip() for line in stack])
+
+    def metrics(self) -> Dict:
+        # Loop lag percentiles and slow callback counts, in milliseconds
+        samples = sorted(self.lag_samples)
+        if not samples:
+            return {"samples": 0, "slow_callbacks": self.slow_callback_count}
+
+        def percentile(fraction):
+            return round(samples[min(len(samples) - 1, int(fraction * len(samples)))] * 1000, 2)
+
+        return {
+            "samples": len(samples),
+            "lag_p50_ms": percentile(0.50),
+            "lag_p99_ms": percentile(0.99),
+            "lag_max_ms": round(samples[-1] * 1000, 2),
+            "slow_callbacks": self.slow_callback_count,
+            "slow_by_stage": dict(Counter(event.stage or event.task for event in self.slow_callbacks))
+        }
+
+    def report(self, top: int = 5) -> str:
+        # Human-readable summary of the slowest blocking events
+        metrics = self.metrics()
+        lines = ["EVENT LOOP HEALTH", f"Metrics: {metrics}"]
+
+        slowest = sorted(self.slow_callbacks, key=lambda event: event.duration_ms or 0, reverse=True)[:top]
+        for event in slowest:
+            lines.append(
+                f"\n{event.duration_ms}ms blocked - task: {event.task}, stage: {event.stage or 'n/a'}, "
+                f"at: {event.location or 'unknown'}"
+            )
+            lines.extend(f"    {line}" for line in event.stack[-4:])
+
+        return "\n".join(lines)
+
+    def _set_stage(self, task, stage: Optional[str]):
+        if stage is None:
+            self._task_stages.pop(task, None)
+        else:
+            self._task_stages[task] = stage
+
+@contextmanager
+def track_stage(stage: str):
+    # Label the current task's pipeline stage for slow callback attribution (no-op when unmonitored)
+    monitor = _active_monitor
+    task = asyncio.current_task() if monitor else None
+    if task is None:
+        yield
+        return
+
+    previous = monitor._task_stages.get(task)
+    monitor._set_stage(task, stage)
+    try:
+        yield
+    finally:
+        monitor._set_stage(task, previous)
+
+def create_loop_monitor() -> LoopMonitor:
+    return LoopMonitor(
+        interval_ms=LOOP_MONITOR["interval_ms"],
+        slow_threshold_ms=LOOP_MONITOR["slow_threshold_ms"],
+        max_events=LOOP_MONITOR["max_events"]
+    )
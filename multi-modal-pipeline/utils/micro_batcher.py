@@ -0,0 +1,173 @@
+import asyncio
+import contextvars
+import json
+from typing import Dict, List, Tuple
+from config.settings import MICRO_BATCHING, MODEL_CONFIG
+from utils.scheduler import current_priority, current_tenant
+
+# A queued prompt, its caller's future and the caller's context (priority lane and tenant)
+PendingItem = Tuple[str, asyncio.Future, contextvars.Context]
+
+BATCH_PROMPT_HEADER = """
+        You will receive {count} independent tasks. Complete each task exactly as its
+        own instructions say, without letting one task influence another.
+        """
+
+BATCH_PROMPT_FOOTER = """
+        Return ONLY a JSON array with exactly {count} entries, one per task, in task order:
+        [
+            {{"index": 0, "result": {{the JSON object task 0 asks for}}}},
+            {{"index": 1, "result": {{the JSON object task 1 asks for}}}}
+        ]
+        """
+
+class MicroBatcher:
+    # Collects prompts for the same agent arriving within a short window and sends
+    # them as one multi-item LLM call, then hands each caller its own result.
+    # Items the batched answer does not cover fall back to an individual call.
+    # Prompts are only batched with others of the same priority class and tenant,
+    # so each batch waits in that class's scheduler lane and is charged to the
+    # tenant whose prompts it carries.
+
+    def __init__(self, agent, window_ms: float = 20, max_items: int = 8):
+        self.agent = agent
+        self.window = window_ms / 1000
+        self.max_items = max_items
+        self._pending: Dict[Tuple[str, str], List[PendingItem]] = {}
+        self._timers: Dict[Tuple[str, str], asyncio.TimerHandle] = {}
+        self._tasks = set()
+        self.stats = {"batches": 0, "items": 0, "batched_items": 0, "fallbacks": 0}
+
+    async def submit(self, prompt: str) -> Dict:
+        # Queue a prompt and wait for its parsed JSON result
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        lane = (current_priority(), current_tenant())
+        pending = self._pending.setdefault(lane, [])
+        pending.append((prompt, future, contextvars.copy_context()))
+        self.stats["items"] += 1
+
+        if len(pending) >= self.max_items:
+            self._flush(lane)
+        elif lane not in self._timers:
+            self._timers[lane] = loop.call_later(self.window, self._flush, lane)
+
+        return await future
+
+    def _flush(self, lane: Tuple[str, str]):
+        # Send everything collected so far for one (priority, tenant) lane as one batch
+
+        timer = self._timers.pop(lane, None)
+        if timer is not None:
+            timer.cancel()
+
+        batch = self._pending.pop(lane, [])
+        if batch:
+            # Run in a member's context so the model call queues in this lane and tenant
+            self._spawn(self._run_batch(batch), batch[0][2])
+
+    def _spawn(self, coro, context: contextvars.Context) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(coro, context=context)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _run_batch(self, batch: List[PendingItem]):
+        if len(batch) == 1:
+            prompt, future, _ = batch[0]
+            await self._run_individual(prompt, future)
+            return
+
+        self.stats["batches"] += 1
+        results = {}
+        try:
+            response = await self.agent._generate(
+                self._build_batch_prompt([prompt for prompt, _, _ in batch]),
+                max_output_tokens=MODEL_CONFIG["max_tokens"] * len(batch)
+            )
+            results = self._parse_batch_response(response.text, len(batch))
+        except Exception as e:
+            print(f"Micro-batch of {len(batch)} failed, falling back to individual calls: {str(e)}")
+
+        fallbacks = []
+        for index, (prompt, future, context) in enumerate(batch):
+            if future.done():
+                continue
+            if index in results:
+                future.set_result(results[index])
+                self.stats["batched_items"] += 1
+            else:
+                # Each fallback call runs in its own caller's context
+                fallbacks.append(self._spawn(self._run_individual(prompt, future), context))
+
+        if fallbacks:
+            self.stats["fallbacks"] += len(fallbacks)
+            await asyncio.gather(*fallbacks)
+
+    async def _run_individual(self, prompt: str, future: asyncio.Future):
+        # Call the agent's model directly for a single prompt
+
+        try:
+            response = await self.agent._generate(prompt)
+            result = json.loads(response.text.strip())
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+
+        if not future.done():
+            future.set_result(result)
+
+    def _build_batch_prompt(self, prompts: List[str]) -> str:
+        sections = [BATCH_PROMPT_HEADER.format(count=len(prompts))]
+        for index, prompt in enumerate(prompts):
+            sections.append(f"=== TASK {index} ===\n{prompt.strip()}")
+        sections.append(BATCH_PROMPT_FOOTER.format(count=len(prompts)))
+        return "\n".join(sections)
+
+    def _parse_batch_response(self, text: str, count: int) -> Dict[int, Dict]:
+        # Map task index to result, keeping only well-formed JSON objects
+
+        cleaned = text.strip()
+        if cleaned.startswith("```json"):
+            cleaned = cleaned[7:]
+        if cleaned.endswith("```"):
+            cleaned = cleaned[:-3]
+
+        entries = json.loads(cleaned.strip())
+        if not isinstance(entries, list):
+            raise ValueError("Batched response is not a JSON array")
+
+        results = {}
+        for position, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                continue
+            index = entry.get("index", position)
+            result = entry.get("result")
+            if isinstance(index, int) and 0 <= index < count and isinstance(result, dict):
+                results.setdefault(index, result)
+        return results
+
+    def metrics(self) -> Dict:
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "avg_batch_size": self.stats["batched_items"] / batches if batches else 0.0
+        }
+
+# Batchers are shared by every pipeline in the process so concurrent requests meet
+_batchers: Dict[str, MicroBatcher] = {}
+
+def get_micro_batcher(agent_name: str, agent) -> MicroBatcher:
+    # Process-wide batcher for one agent type; the first agent registered makes the calls
+    if agent_name not in _batchers:
+        _batchers[agent_name] = MicroBatcher(
+            agent,
+            window_ms=MICRO_BATCHING["window_ms"],
+            max_items=MICRO_BATCHING["max_items"]
+        )
+    return _batchers[agent_name]
+
+def get_batcher_metrics() -> Dict[str, Dict]:
+    return {name: batcher.metrics() for name, batcher in _batchers.items()}
@@ -0,0 +1,136 @@
+import re
+from typing import Dict, List
+from config.settings import PLATFORMS
+
+_HASHTAG_RE = re.compile(r"#\w+")
+
+# Room kept at the end of each thread part for the " i/n" marker
+_THREAD_MARKER_RESERVE = 6
+
+def count_hashtags(text: str) -> int:
+    # Count inline hashtags in a block of text
+    return len(_HASHTAG_RE.findall(text))
+
+def split_post(text: str, max_chars: int) -> List[str]:
+    # Split an overlong post into numbered parts that each fit within max_chars
+
+    budget = max_chars - _THREAD_MARKER_RESERVE
+    parts = []
+    current = ""
+
+    for word in text.split():
+        # Hard-slice single words that could never fit (e.g. long URLs)
+        while len(word) > budget:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(word[:budget])
+            word = word[budget:]
+
+        candidate = f"{current} {word}" if current else word
+        if len(candidate) > budget:
+            parts.append(current)
+            current = word
+        else:
+            current = candidate
+
+    if current:
+        parts.append(current)
+
+    total = len(parts)
+    return [f"{part} {index}/{total}" for index, part in enumerate(parts, start=1)]
+
+def validate_platform_content(text_content: Dict, platform: str) -> Dict:
+    # Check text generator output against PLATFORMS limits using real counts.
+    # Trivial violations are fixed in place; anything that needs a rewrite is
+    # reported under platform_validation["violations"] for the reflection loop.
+
+    specs = PLATFORMS.get(platform, {})
+    result = dict(text_content)
+    content = result.get("content", "") or ""
+    hashtags = list(result.get("hashtags", []) or [])
+
+    fixes_applied = []
+    violations = []
+
+    # Hashtags: the hashtags list is trimmed first, inline tags need a rewrite
+    hashtag_limit = specs.get("hashtags")
+    inline_hashtags = count_hashtags(content)
+    if hashtag_limit is not None:
+        allowed = max(hashtag_limit - inline_hashtags, 0)
+        if len(hashtags) > allowed:
+            fixes_applied.append(f"Trimmed hashtags from {len(hashtags)} to {allowed}")
+            hashtags = hashtags[:allowed]
+            result["hashtags"] = hashtags
+        if inline_hashtags > hashtag_limit:
+            violations.append(
+                f"Content has {inline_hashtags} inline hashtags; {platform} allows {hashtag_limit}"
+            )
+
+    # Character limit, counted on the post as published: the hashtags list is
+    # posted after the content. X posts can be split into a thread (tags end up
+    # in the last part); longer formats need a rewrite.
+    posted = f"{content} {' '.join(hashtags)}" if hashtags else content
+    max_chars = specs.get("max_chars")
+    thread = None
+    if max_chars is not None and len(posted) > max_chars:
+        if platform == "x":
+            thread = split_post(posted, max_chars)
+            fixes_applied.append(f"Split {len(posted)}-char post (with hashtags) into a {len(thread)}-part thread")
+            result["thread"] = thread
+            result["content"] = thread[0]
+        else:
+            violations.append(f"Post is {len(posted)} characters with hashtags; {platform} max is {max_chars}")
+
+    # Word counts come from the text itself, not from the model's own estimate
+    word_count = len((text_content.get("content", "") or "").split())
+    reported_word_count = result.get("word_count")
+    result["word_count"] = word_count
+
+    min_words = specs.get("min_words")
+    max_words = specs.get("max_words")
+    if min_words is not None and word_count < min_words:
+        violations.append(f"Content is {word_count} words; {platform} minimum is {min_words}")
+    if max_words is not None and word_count > max_words:
+        violations.append(f"Content is {word_count} words; {platform} maximum is {max_words}")
+
+    # Counts describe the whole post; threads also report each part
+    part_char_counts = [len(part) for part in thread] if thread else [len(posted)]
+    result["platform_validation"] = {
+        "platform": platform,
+        "char_count": sum(part_char_counts),
+        "part_char_counts": part_char_counts,
+        "max_part_chars": max(part_char_counts),
+        "hashtags_in_thread": bool(thread and hashtags),
+        "word_count": word_count,
+        "reported_word_count": reported_word_count,
+        "hashtag_count": len(hashtags) + inline_hashtags,
+        "fixes_applied": fixes_applied,
+        "violations": violations,
+        "passed": not violations
+    }
+
+    return result
+
+
+def adapt_to_platform(text_content: Dict, platform: str) -> Dict:
+    # Derive a platform variant from core content without an LLM call.
+    # Short-form platforms get the summary when the full body is over their limit;
+    # validate_platform_content then applies the usual trims and splits.
+
+    specs = PLATFORMS.get(platform, {})
+    variant = {
+        key: text_content.get(key)
+        for key in ("title", "content", "summary", "hashtags", "call_to_action")
+        if text_content.get(key) is not None
+    }
+    variant["platform"] = platform
+
+    content = variant.get("content", "") or ""
+    max_chars = specs.get("max_chars")
+    if max_chars is not None and len(content) > max_chars and variant.get("summary"):
+        call_to_action = variant.get("call_to_action")
+        condensed = f"{variant['summary']}\n\n{call_to_action}" if call_to_action else variant["summary"]
+        variant["content"] = condensed if len(condensed) <= max_chars else variant["summary"]
+
+    return validate_platform_content(variant, platform)
@@ -0,0 +1,71 @@
+import json
+import textwrap
+from string import Formatter
+from typing import Dict, List, Tuple
+
+# Rough characters-per-token ratio for Gemini text, used for size estimates only
+_CHARS_PER_TOKEN = 4
+
+_prompt_stats: Dict[str, Dict] = {}
+
+def compact_json(value) -> str:
+    # Serialize without indentation or padding - same data, smaller prompt
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+def request_json(content_request: Dict, context: Dict = None) -> str:
+    # The request serialized once per pipeline run and shared through the agent context
+    if context and context.get("request_json"):
+        return context["request_json"]
+    return compact_json(content_request)
+
+class PromptTemplate:
+    # Prompt compiled once: the text is dedented, parsed into literal and field
+    # segments, and static values are folded into the literals, so rendering is a
+    # single join over the few fields that change per call
+
+    def __init__(self, name: str, text: str, static: Dict[str, str] = None):
+        self.name = name
+        static = static or {}
+
+        segments: List[Tuple[bool, str]] = []
+        literal = []
+        for text_part, field, _, _ in Formatter().parse(textwrap.dedent(text).strip()):
+            literal.append(text_part)
+            if field is None:
+                continue
+            if field in static:
+                literal.append(str(static[field]))
+            else:
+                segments.append((False, "".join(literal)))
+                segments.append((True, field))
+                literal = []
+        segments.append((False, "".join(literal)))
+
+        self._segments = [(is_field, value) for is_field, value in segments if is_field or value]
+        self.fields = {value for is_field, value in self._segments if is_field}
+        self.static_bytes = sum(len(value.encode("utf-8")) for is_field, value in self._segments if not is_field)
+
+    def render(self, **values) -> str:
+        prompt = "".join(str(values[value]) if is_field else value for is_field, value in self._segments)
+        record_prompt_size(self.name, prompt)
+        return prompt
+
+def record_prompt_size(name: str, prompt: str):
+    stats = _prompt_stats.setdefault(name, {"calls": 0, "total_bytes": 0, "max_bytes": 0})
+    size = len(prompt.encode("utf-8"))
+    stats["calls"] += 1
+    stats["total_bytes"] += size
+    stats["max_bytes"] = max(stats["max_bytes"], size)
+
+def get_prompt_stats() -> Dict[str, Dict]:
+    # Prompt byte and estimated token sizes per template
+    report = {}
+    for name, stats in _prompt_stats.items():
+        avg_bytes = stats["total_bytes"] / stats["calls"]
+        report[name] = {
+            "calls": stats["calls"],
+            "avg_bytes": round(avg_bytes),
+            "max_bytes": stats["max_bytes"],
+            "avg_tokens_est": round(avg_bytes / _CHARS_PER_TOKEN)
+        }
+    return report
@@ -0,0 +1,188 @@
+import asyncio
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from config.settings import ITERATIONS_DIR, RESULT_RETENTION, ensure_output_dirs
+
+# Score fields the agents report, checked in this order
+_SCORE_KEYS = ("overall_quality_score", "brand_compliance_score", "seo_score")
+
+class AgentSummary:
+    # Compact record of one agent's result within an iteration
+
+    __slots__ = ("agent", "success", "score", "error")
+
+    def __init__(self, agent: str, success: bool, score=None, error: Optional[str] = None):
+        self.agent = agent
+        self.success = success
+        self.score = score
+        self.error = error
+
+    @classmethod
+    def from_output(cls, agent: str, output: Dict) -> "AgentSummary":
+        error = output.get("error")
+        score = next((output[key] for key in _SCORE_KEYS if key in output), None)
+        return cls(agent, success=error is None and output.get("success", True), score=score, error=error)
+
+    def to_dict(self) -> Dict:
+        summary = {"agent": self.agent, "success": self.success}
+        if self.score is not None:
+            summary["score"] = self.score
+        if self.error is not None:
+            summary["error"] = self.error
+        return summary
+
+class IterationSummary:
+    # Compact in-memory record of a completed iteration; the full outputs live on disk
+
+    __slots__ = ("iteration", "qa_score", "approval_status", "agents", "spilled_to", "timestamp")
+
+    def __init__(self, iteration: int, qa_score, approval_status: Optional[str],
+                 agents: List[AgentSummary], spilled_to: Optional[str], timestamp: str):
+        self.iteration = iteration
+        self.qa_score = qa_score
+        self.approval_status = approval_status
+        self.agents = agents
+        self.spilled_to = spilled_to
+        self.timestamp = timestamp
+
+    def to_dict(self) -> Dict:
+        return {
+            "iteration": self.iteration,
+            "qa_score": self.qa_score,
+            "approval_status": self.approval_status,
+            "agents": [agent.to_dict() for agent in self.agents],
+            "spilled_to": self.spilled_to,
+            "timestamp": self.timestamp
+        }
+
+def to_result_dict(record):
+    # Iteration record as it appears in returned results: always a plain dict
+    return record.to_dict() if hasattr(record, "to_dict") else record
+
+class IterationStore:
+    # Spills completed iterations of one pipeline run to the results store
+
+    def __init__(self, content_request: Dict, directory: Path = None, spill: bool = None):
+        self.spill_enabled = RESULT_RETENTION["spill_iterations"] if spill is None else spill
+        self.directory = Path(directory) if directory else ITERATIONS_DIR
+
+        topic = content_request.get("topic", "content").replace(" ", "_")
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        self.path = self.directory / f"{topic}_{timestamp}_iterations.jsonl"
+
+    def record(self, iteration_results: Dict):
+        # Return the record to keep for this iteration: the full dict when
+        # spilling is off, otherwise a compact summary
+
+        if not self.spill_enabled:
+            return iteration_results
+
+        self._spill(iteration_results)
+        return self._summarize(iteration_results)
+
+    async def arecord(self, iteration_results: Dict):
+        # record() for the pipeline: serialization and the file append run in a
+        # worker thread so they never block the event loop
+
+        if not self.spill_enabled:
+            return iteration_results
+
+        await asyncio.to_thread(self._spill, iteration_results)
+        return self._summarize(iteration_results)
+
+    def _spill(self, iteration_results: Dict):
+        if self.directory == ITERATIONS_DIR:
+            ensure_output_dirs()
+        else:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(iteration_results, ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+
+    def _summarize(self, iteration_results: Dict) -> IterationSummary:
+        qa_results = iteration_results.get("qa_results", {})
+        return IterationSummary(
+            iteration=iteration_results["iteration"],
+            qa_score=qa_results.get("overall_quality_score"),
+            approval_status=qa_results.get("approval_status"),
+            agents=[
+                AgentSummary.from_output(name, output)
+                for name, output in iteration_results.get("agent_outputs", {}).items()
+                if isinstance(output, dict)
+            ],
+            spilled_to=str(self.path),
+            timestamp=iteration_results.get("timestamp", datetime.now().isoformat())
+        )
+
+def load_spilled_iterations(path: str) -> List[Dict]:
+    # Read back the full iteration records of a run
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def _synthetic_iteration(request_number: int, iteration: int) -> Dict:
+    # Iteration results sized like a real LinkedIn run
+    body = f"Request {request_number} iteration {iteration}. " + "Insightful sentence about the topic. " * 60
+    return {
+        "iteration": iteration,
+        "agent_outputs": {
+            "text_generator": {"agent": "text_generator", "title": "Title", "content": body,
+                               "summary": body[:300], "hashtags": ["#innovation", "#quality"]},
+            "image_creator": {"agent": "image_creator", "image_path": "outputs/images/x.png",
+                              "prompt_used": "Create a professional image. " * 25, "success": True},
+            "seo_optimizer": {"agent": "seo_optimizer", "seo_score": 8, "meta_description": body[:160],
+                              "keywords": ["primary", "secondary", "long-tail"]},
+            "brand_validator": {"agent": "brand_validator", "brand_compliance_score": 8,
+                                "overall_assessment": body[:800], "approved": True}
+        },
+        "qa_results": {"agent": "qa_agent", "overall_quality_score": 6 + iteration,
+                       "approval_status": "approved" if iteration == 2 else "needs_revision",
+                       "strengths": ["clear"], "weaknesses": [body[:400]]},
+        "timestamp": datetime.now().isoformat()
+    }
+
+def measure_batch_peak_rss(requests: int, spill: bool, directory: Path) -> Dict:
+    # Simulate a batch of two-iteration runs whose results the caller keeps, and
+    # report peak resident memory for the process
+    import resource
+    import sys
+
+    batch_results = []
+    for request_number in range(requests):
+        store = IterationStore({"topic": f"bench {request_number}"}, directory=directory, spill=spill)
+        iterations = [to_result_dict(store.record(_synthetic_iteration(request_number, i))) for i in (1, 2)]
+        batch_results.append({"iterations": iterations})
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    return {"requests": requests, "spill": spill, "peak_rss_mb": round(peak_mb, 1)}
+
+if __name__ == "__main__":
+    # python -m utils.retention --requests 10000
+    # Each mode runs in a fresh interpreter, since a process's peak RSS never goes down
+    import argparse
+    import subprocess
+    import sys
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Measure peak RSS of a batch with and without iteration spilling")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--mode", choices=["keep", "spill"])
+    parser.add_argument("--directory")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(measure_batch_peak_rss(args.requests, args.mode == "spill", Path(args.directory))))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            for mode in ("keep", "spill"):
+                completed = subprocess.run(
+                    [sys.executable, "-m", "utils.retention", "--requests", str(args.requests),
+                     "--mode", mode, "--directory", tmp],
+                    capture_output=True, text=True, check=True
+                )
+                result = json.loads(completed.stdout)
+                print(f"{mode:>5}: {result['requests']} requests, peak RSS {result['peak_rss_mb']} MB")
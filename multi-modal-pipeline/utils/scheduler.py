@@ -0,0 +1,195 @@
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Optional
+from config.settings import SCHEDULER
+
+# Highest priority first; a class is only served when every class above it is idle
+PRIORITIES = ("interactive", "bulk", "background")
+
+# Priority class and tenant of the pipeline request the current task belongs to
+_request_priority: ContextVar[str] = ContextVar("request_priority", default=SCHEDULER["default_priority"])
+_request_tenant: ContextVar[str] = ContextVar("request_tenant", default="default")
+
+class OverloadedError(Exception):
+    # Raised when admission control sheds a new request
+    pass
+
+def normalize_priority(priority: Optional[str]) -> str:
+    return priority if priority in PRIORITIES else SCHEDULER["default_priority"]
+
+def current_priority() -> str:
+    # Priority class of the request the current task is serving
+    return normalize_priority(_request_priority.get())
+
+def current_tenant() -> str:
+    # Tenant of the request the current task is serving
+    return _request_tenant.get()
+
+class LLMScheduler:
+    # Shared concurrency pool for model calls with strict priority classes,
+    # weighted fair sharing between tenants inside a class, and queue-depth
+    # based admission control
+
+    def __init__(self, max_concurrency: int, queue_limits: Dict[str, int],
+                 degrade_at: Dict[str, int], tenant_weights: Dict[str, float] = None):
+        self.max_concurrency = max_concurrency
+        self.queue_limits = queue_limits
+        self.degrade_at = degrade_at
+        self.tenant_weights = tenant_weights or {}
+
+        self._active = 0
+        self._queues: Dict[str, Dict[str, Deque[asyncio.Future]]] = {priority: {} for priority in PRIORITIES}
+        self._virtual_time: Dict[str, Dict[str, float]] = {priority: {} for priority in PRIORITIES}
+        self.stats = {
+            "granted": {priority: 0 for priority in PRIORITIES},
+            "rejected": {priority: 0 for priority in PRIORITIES},
+            "degraded": {priority: 0 for priority in PRIORITIES}
+        }
+
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queues in self._queues.values() for queue in queues.values())
+
+    def admit(self, priority: str):
+        # Reject new work of this class early when the shared queue is already too deep
+
+        limit = self.queue_limits.get(priority)
+        if limit is not None and self.queue_depth() >= limit:
+            self.stats["rejected"][priority] += 1
+            raise OverloadedError(f"LLM queue depth {self.queue_depth()} has reached the {priority} limit of {limit}")
+
+    def should_degrade(self, priority: str) -> bool:
+        # Whether new work of this class should run in a cheaper, degraded mode
+
+        threshold = self.degrade_at.get(priority)
+        degrade = threshold is not None and self.queue_depth() >= threshold
+        if degrade:
+            self.stats["degraded"][priority] += 1
+        return degrade
+
+    async def acquire(self, priority: str, tenant: str):
+        # Wait for a concurrency slot; callers must release() afterwards.
+        # Calls are never shed here: a request that passed admission gets to
+        # finish, so load shedding only happens in admitted_request.
+
+        if self._active < self.max_concurrency and self.queue_depth() == 0:
+            self._active += 1
+            self._charge(priority, tenant)
+            return
+
+        queues = self._queues[priority]
+        if not queues.get(tenant):
+            # A tenant returning from idle starts level with the busiest backlog,
+            # so idle time cannot be banked into a burst later
+            backlogged = [self._virtual_time[priority].get(name, 0.0) for name, queue in queues.items() if queue]
+            if backlogged:
+                current = self._virtual_time[priority].get(tenant, 0.0)
+                self._virtual_time[priority][tenant] = max(current, min(backlogged))
+
+        future = asyncio.get_running_loop().create_future()
+        queues.setdefault(tenant, deque()).append(future)
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as the caller gave up
+                self.release()
+            else:
+                queue = queues.get(tenant)
+                if queue and future in queue:
+                    queue.remove(future)
+            raise
+
+    def release(self):
+        self._active -= 1
+        self._dispatch()
+
+    def _charge(self, priority: str, tenant: str):
+        weight = self.tenant_weights.get(tenant, 1.0)
+        times = self._virtual_time[priority]
+        times[tenant] = times.get(tenant, 0.0) + 1.0 / weight
+        self.stats["granted"][priority] += 1
+
+    def _dispatch(self):
+        # Hand free slots to waiters: highest class first, then least-served tenant
+
+        while self._active < self.max_concurrency:
+            granted = False
+            for priority in PRIORITIES:
+                queues = self._queues[priority]
+                waiting = [tenant for tenant, queue in queues.items() if queue]
+                while waiting and not granted:
+                    tenant = min(waiting, key=lambda name: self._virtual_time[priority].get(name, 0.0))
+                    future = queues[tenant].popleft()
+                    if not queues[tenant]:
+                        waiting.remove(tenant)
+                    if future.done():
+                        continue
+                    self._active += 1
+                    self._charge(priority, tenant)
+                    future.set_result(None)
+                    granted = True
+                if granted:
+                    break
+            if not granted:
+                return
+
+    @asynccontextmanager
+    async def slot(self, priority: str = None, tenant: str = None):
+        # Hold a concurrency slot for one model call, defaulting to the current request's class
+        priority = normalize_priority(priority or _request_priority.get())
+        tenant = tenant or _request_tenant.get()
+
+        await self.acquire(priority, tenant)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def metrics(self) -> Dict:
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self.queue_depth(),
+            **self.stats
+        }
+
+_scheduler = None
+
+def get_scheduler() -> LLMScheduler:
+    # Process-wide scheduler shared by every agent and pipeline
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler(
+            max_concurrency=SCHEDULER["max_concurrency"],
+            queue_limits=SCHEDULER["queue_limits"],
+            degrade_at=SCHEDULER["degrade_at"],
+            tenant_weights=SCHEDULER["tenant_weights"]
+        )
+    return _scheduler
+
+@contextmanager
+def admitted_request(content_request: Dict):
+    # Admission control for one pipeline request. Sheds the request if its class is
+    # over its queue limit, tags every model call made while it runs with its
+    # priority and tenant, and reports whether it should run degraded.
+
+    priority = normalize_priority(content_request.get("priority"))
+    tenant = str(content_request.get("tenant", "default"))
+
+    if not SCHEDULER["enabled"]:
+        yield {"priority": priority, "tenant": tenant, "degraded": False}
+        return
+
+    scheduler = get_scheduler()
+    scheduler.admit(priority)
+
+    priority_token = _request_priority.set(priority)
+    tenant_token = _request_tenant.set(tenant)
+    try:
+        yield {"priority": priority, "tenant": tenant, "degraded": scheduler.should_degrade(priority)}
+    finally:
+        _request_priority.reset(priority_token)
+        _request_tenant.reset(tenant_token)
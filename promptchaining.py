@@ -1,24 +1,188 @@
 import os
+import re
 import json
-import requests
-from bs4 import BeautifulSoup
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnableLambda
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# Initialize LLM
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    temperature=0.7,
-    google_api_key=os.getenv("GOOGLE_API_KEY")
-)
+import time
+import hashlib
+from collections import defaultdict, deque
+from pathlib import Path
+from functools import lru_cache
+
+# LangChain, the Gemini client, requests and BeautifulSoup are all imported on
+# first use so that importing this module (e.g. just to parse results) stays cheap
+
+MODEL_NAME = "gemini-2.5-flash"
+
+# Record/replay of LLM traffic for offline load tests, in the same cassette
+# format as multi-modal-pipeline/utils/cassette.py. LLM_CASSETTE_MODE is "off",
+# "record" or "replay"; replayed latencies are divided by LLM_CASSETTE_TIME_SCALE
+CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off")
+CASSETTE_PATH = Path(os.getenv("LLM_CASSETTE_PATH", Path(__file__).parent / "llm_cassette.jsonl"))
+CASSETTE_TIME_SCALE = float(os.getenv("LLM_CASSETTE_TIME_SCALE", "1"))
+
+@lru_cache(maxsize=None)
+def get_llm():
+    """Initialize the LLM on first use"""
+    if CASSETTE_MODE == "replay":
+        return get_replay_llm()
+    
+    from dotenv import load_dotenv
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    
+    load_dotenv()
+    return ChatGoogleGenerativeAI(
+        model=MODEL_NAME,
+        temperature=0.7,
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+        callbacks=[get_cassette_recorder()] if CASSETTE_MODE == "record" else None
+    )
+
+def prompt_key(model, prompt):
+    """Cassette key for a call: hash of the model and the prompt text"""
+    payload = json.dumps([model, prompt], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+def step_label(tags):
+    """Chain step a model call belongs to, from the tags set in the chains"""
+    return next((tag for tag in tags or [] if tag in STEP_TEMPLATES), MODEL_NAME)
+
+@lru_cache(maxsize=None)
+def get_cassette_recorder():
+    """Callback handler that appends every model call to the cassette"""
+    import threading
+    from langchain_core.callbacks import BaseCallbackHandler
+    from langchain_core.messages import get_buffer_string
+    
+    class CassetteRecorder(BaseCallbackHandler):
+        run_inline = True  # timings must not include executor hops
+        
+        def __init__(self, path):
+            self.path = path
+            self.started = time.perf_counter()
+            self.seq = 0
+            self.lock = threading.Lock()
+            self.pending = {}
+        
+        def on_chat_model_start(self, serialized, messages, *, run_id, tags=None, **kwargs):
+            self.pending[run_id] = (get_buffer_string(messages[0]), step_label(tags), time.perf_counter())
+        
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            if run_id not in self.pending:
+                return
+            prompt, label, started = self.pending.pop(run_id)
+            generation = response.generations[0][0]
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            
+            with self.lock:
+                self.seq += 1
+                entry = {
+                    "seq": self.seq,
+                    "t_ms": round((started - self.started) * 1000, 1),
+                    "label": label,
+                    "model": MODEL_NAME,
+                    "key": prompt_key(MODEL_NAME, prompt),
+                    "prompt_chars": len(prompt),
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                    "prompt_tokens": usage.get("input_tokens"),
+                    "response_tokens": usage.get("output_tokens"),
+                    "text": generation.text
+                }
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self.pending.pop(run_id, None)
+    
+    return CassetteRecorder(CASSETTE_PATH)
+
+class CassetteReplay:
+    """Serve recorded calls by prompt hash, then by step in recorded order, cycling through repeats"""
+    
+    def __init__(self, path, time_scale=1.0):
+        self.path = path
+        self.time_scale = time_scale
+        self.by_key = defaultdict(deque)
+        self.by_label = defaultdict(deque)
+        self.stats = {"calls": 0, "hits": 0, "label_fallbacks": 0}
+        
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.by_key[entry["key"]].append(entry)
+                    self.by_label[entry["label"]].append(entry)
+    
+    def next(self, prompt, label):
+        """Return the recorded entry for this call and how long to wait before answering"""
+        self.stats["calls"] += 1
+        queue = self.by_key.get(prompt_key(MODEL_NAME, prompt))
+        if queue:
+            self.stats["hits"] += 1
+        else:
+            queue = self.by_label.get(label)
+            if not queue:
+                raise LookupError(f"No recorded call for step {label!r} in {self.path}")
+            self.stats["label_fallbacks"] += 1
+        
+        entry = queue.popleft()
+        queue.append(entry)
+        delay = entry.get("latency_ms", 0) / 1000 / self.time_scale if self.time_scale > 0 else 0.0
+        return entry, delay
+
+@lru_cache(maxsize=None)
+def get_replay_llm():
+    """Chat model that answers from the cassette with its recorded latencies"""
+    import asyncio
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage, AIMessageChunk, get_buffer_string
+    from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+    
+    cassette = CassetteReplay(CASSETTE_PATH, CASSETTE_TIME_SCALE)
+    
+    def to_result(entry):
+        usage = None
+        if entry.get("prompt_tokens") is not None and entry.get("response_tokens") is not None:
+            usage = {
+                "input_tokens": entry["prompt_tokens"],
+                "output_tokens": entry["response_tokens"],
+                "total_tokens": entry["prompt_tokens"] + entry["response_tokens"]
+            }
+        message = AIMessage(content=entry["text"], usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+    
+    class ReplayChatModel(BaseChatModel):
+        @property
+        def _llm_type(self):
+            return "cassette-replay"
+        
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            entry, delay = cassette.next(get_buffer_string(messages), step_label(run_manager and run_manager.tags))
+            time.sleep(delay)
+            return to_result(entry)
+        
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+            entry, delay = cassette.next(get_buffer_string(messages), step_label(run_manager and run_manager.tags))
+            await asyncio.sleep(delay)
+            return to_result(entry)
+        
+        async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+            # Line by line, with the recorded latency spread evenly across the lines
+            entry, delay = cassette.next(get_buffer_string(messages), step_label(run_manager and run_manager.tags))
+            lines = entry["text"].splitlines(keepends=True) or [""]
+            for line in lines:
+                await asyncio.sleep(delay / len(lines))
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=line))
+                if run_manager:
+                    await run_manager.on_llm_new_token(line, chunk=chunk)
+                yield chunk
+    
+    return ReplayChatModel()
 
 def fetch_blog_content(url):
     """Fetch and clean blog content"""
+    import requests
+    from bs4 import BeautifulSoup
+    
     headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
     
     response = requests.get(url, headers=headers, timeout=10)
@@ -45,29 +209,26 @@ def fetch_blog_content(url):
     return ' '.join(chunk for chunk in chunks if chunk)
 
 # Define the 3 chain steps
-extract_prompt = ChatPromptTemplate.from_template(
-    """Extract 5-7 key insights from this blog that would make engaging social media content:
+DEFAULT_THREAD_STYLE = "Conversational tone"
+
+EXTRACT_TEMPLATE = """Extract 5-7 key insights from this blog that would make engaging social media content:
 
     {blog_content}
 
     Focus on actionable advice, interesting facts, and thought-provoking ideas. Return as bullet points."""
-)
 
-thread_prompt = ChatPromptTemplate.from_template(
-    """Convert these key points into a Twitter thread. Requirements:
+THREAD_TEMPLATE = """Convert these key points into a Twitter thread. Requirements:
     - 4-7 tweets total
     - Each under 280 characters
-    - Conversational tone
+    - {style}
     - No hashtags
     - Start with engaging hook
 
     Key Points: {key_points}
 
     Format: 1/n Tweet content..."""
-)
 
-json_prompt = ChatPromptTemplate.from_template(
-    """Convert this thread to JSON format:
+JSON_TEMPLATE = """Convert this thread to JSON format:
 
     {thread}
 
@@ -77,23 +238,142 @@ json_prompt = ChatPromptTemplate.from_template(
             {{"tweet_number": 1, "content": "tweet text", "character_count": 0}}
         ]
     }}"""
-)
+
+@lru_cache(maxsize=None)
+def get_prompts():
+    """Compile the chain's prompt templates on first use"""
+    from langchain_core.prompts import ChatPromptTemplate
+    
+    return {
+        "extract_prompt": ChatPromptTemplate.from_template(EXTRACT_TEMPLATE),
+        "thread_prompt": ChatPromptTemplate.from_template(THREAD_TEMPLATE),
+        "json_prompt": ChatPromptTemplate.from_template(JSON_TEMPLATE)
+    }
 
 # Create chained pipeline
 def format_for_thread(key_points):
-    return {"key_points": key_points}
+    return {"key_points": key_points, "style": DEFAULT_THREAD_STYLE}
 
 def format_for_json(thread):
     return {"thread": thread}
 
-# Build the complete chain using | operator
-complete_chain = (
-    extract_prompt | llm | StrOutputParser() |
-    RunnableLambda(format_for_thread) |
-    thread_prompt | llm | StrOutputParser() |
-    RunnableLambda(format_for_json) |
-    json_prompt | llm | StrOutputParser()
-)
+@lru_cache(maxsize=None)
+def get_complete_chain():
+    """Build the complete chain using | operator on first use"""
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.runnables import RunnableLambda
+    
+    llm = get_llm()
+    prompts = get_prompts()
+    return (
+        prompts["extract_prompt"] | llm.with_config(tags=["extract"]) | StrOutputParser() |
+        RunnableLambda(format_for_thread) |
+        prompts["thread_prompt"] | llm.with_config(tags=["thread"]) | StrOutputParser() |
+        RunnableLambda(format_for_json) |
+        prompts["json_prompt"] | llm.with_config(tags=["json"]) | StrOutputParser()
+    )
+
+@lru_cache(maxsize=None)
+def get_step_chains():
+    """Build each chain step on its own so steps can be checkpointed and resumed"""
+    from langchain_core.output_parsers import StrOutputParser
+    
+    llm = get_llm()
+    prompts = get_prompts()
+    return {
+        "extract": prompts["extract_prompt"] | llm.with_config(tags=["extract"]) | StrOutputParser(),
+        "thread": prompts["thread_prompt"] | llm.with_config(tags=["thread"]) | StrOutputParser(),
+        "json": prompts["json_prompt"] | llm.with_config(tags=["json"]) | StrOutputParser()
+    }
+
+STEP_TEMPLATES = {"extract": EXTRACT_TEMPLATE, "thread": THREAD_TEMPLATE, "json": JSON_TEMPLATE}
+
+class CheckpointStore:
+    """Persist each step's output keyed by a hash of the step, its prompt and its inputs"""
+    
+    def __init__(self, directory=None):
+        self.directory = Path(directory or os.getenv("CHAIN_CHECKPOINT_DIR", Path(__file__).parent / ".chain_checkpoints"))
+        self.stats = {"hits": 0, "misses": 0}
+    
+    def key(self, step, inputs):
+        payload = json.dumps(
+            {"step": step, "template": STEP_TEMPLATES.get(step, ""), "inputs": inputs},
+            sort_keys=True, ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _path(self, step, inputs):
+        return self.directory / f"{step}_{self.key(step, inputs)}.json"
+    
+    def get(self, step, inputs):
+        path = self._path(step, inputs)
+        if not path.exists():
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["output"]
+    
+    def put(self, step, inputs, output):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self._path(step, inputs), "w", encoding="utf-8") as f:
+            json.dump({"step": step, "output": output}, f, ensure_ascii=False)
+    
+    def drop(self, step, inputs):
+        self._path(step, inputs).unlink(missing_ok=True)
+    
+    def run(self, step, inputs, compute):
+        """Return the saved output for these inputs, or compute and save it"""
+        output = self.get(step, inputs)
+        if output is not None:
+            self.stats["hits"] += 1
+            print(f"  ↺ {step}: reused checkpoint")
+            return output
+        
+        self.stats["misses"] += 1
+        print(f"  ▶ {step}: running")
+        output = compute(inputs)
+        self.put(step, inputs, output)
+        return output
+    
+    async def arun(self, step, inputs, compute):
+        """run() for async steps; checkpoint file access stays off the event loop"""
+        import asyncio
+        
+        output = await asyncio.to_thread(self.get, step, inputs)
+        if output is not None:
+            self.stats["hits"] += 1
+            print(f"  ↺ {step}: reused checkpoint")
+            return output
+        
+        self.stats["misses"] += 1
+        print(f"  ▶ {step}: running")
+        output = await compute(inputs)
+        await asyncio.to_thread(self.put, step, inputs, output)
+        return output
+
+@lru_cache(maxsize=None)
+def get_checkpoint_store():
+    return CheckpointStore()
+
+def run_chain_steps(blog_content, style=DEFAULT_THREAD_STYLE, store=None):
+    """Run Extract → Thread → JSON one step at a time, resuming from the first step whose inputs changed"""
+    store = store or get_checkpoint_store()
+    steps = get_step_chains()
+    
+    key_points = store.run("extract", {"blog_content": blog_content}, steps["extract"].invoke)
+    thread = store.run("thread", {"key_points": key_points, "style": style}, steps["thread"].invoke)
+    raw_json = store.run("json", {"thread": thread}, steps["json"].invoke)
+    
+    return {"key_points": key_points, "thread": thread, "raw_json": raw_json}
+
+def __getattr__(name):
+    """Keep the module-level llm, prompts and complete_chain names, built lazily"""
+    if name == "llm":
+        return get_llm()
+    if name == "complete_chain":
+        return get_complete_chain()
+    if name in ("extract_prompt", "thread_prompt", "json_prompt"):
+        return get_prompts()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def parse_json_result(raw_output):
     """Clean and parse LLM JSON output"""
@@ -111,20 +391,35 @@ def parse_json_result(raw_output):
     
     return thread_data
 
-def generate_thread(blog_url):
+def load_blog_content(blog_url, store=None, refresh=False):
+    """Fetch and clean blog content, reusing the saved clean text unless refresh is set"""
+    store = store or get_checkpoint_store()
+    inputs = {"url": blog_url}
+    if refresh:
+        store.drop("fetch", inputs)
+    return store.run("fetch", inputs, lambda step_inputs: fetch_blog_content(step_inputs["url"]))
+
+def generate_thread(blog_url, style=DEFAULT_THREAD_STYLE, refresh=False):
     """Generate Twitter thread from blog URL using LangChain chaining"""
     print(f"Processing: {blog_url}")
+    store = get_checkpoint_store()
     
     # Fetch content
-    blog_content = fetch_blog_content(blog_url)
+    blog_content = load_blog_content(blog_url, store, refresh)
     print(f"Extracted {len(blog_content)} characters")
     
-    # Run the complete chained pipeline
+    # Run the chained pipeline, resuming from saved step outputs
     print("Running chained pipeline: Extract → Thread → JSON...")
-    raw_result = complete_chain.invoke({"blog_content": blog_content[:3000]})
+    outputs = run_chain_steps(blog_content[:3000], style, store)
     
-    # Parse result
-    thread_data = parse_json_result(raw_result)
+    # Parse result; a formatting failure only re-runs the JSON step
+    try:
+        thread_data = parse_json_result(outputs["raw_json"])
+    except (ValueError, KeyError, TypeError):
+        print("JSON formatting failed - re-running the JSON step only...")
+        store.drop("json", {"thread": outputs["thread"]})
+        outputs = run_chain_steps(blog_content[:3000], style, store)
+        thread_data = parse_json_result(outputs["raw_json"])
     
     # Display results
     print(f"\nGenerated {len(thread_data['thread'])} tweets:")
@@ -134,6 +429,128 @@ def generate_thread(blog_url):
     
     return thread_data
 
+# "1/5", "**2/n**", "Tweet 3/5:" at the start of a line
+TWEET_MARKER = re.compile(r"^[\s*_#>-]*(?:tweet\s*)?(\d+)\s*/\s*(\d+|n)\b[\s*_:.)-]*", re.IGNORECASE | re.MULTILINE)
+
+class TweetSplitter:
+    """Cut thread text into tweets at their 1/n markers as it streams in
+    
+    A tweet is complete once the next tweet's marker arrives (or the text ends).
+    Markers must count up from 1, so stray fractions at the start of a line
+    ("50/50 odds...") are not mistaken for the start of another tweet.
+    """
+    
+    def __init__(self):
+        self.buffer = ""
+        self.markers = []  # (number, total, marker start, body start)
+        self.emitted = 0
+        self.scan_from = 0
+    
+    def feed(self, text):
+        """Add streamed text and return the tweets it completed"""
+        self.buffer += text
+        for match in TWEET_MARKER.finditer(self.buffer, self.scan_from):
+            if match.end() == len(self.buffer):
+                break  # the marker may still be growing, e.g. "1/1" of "1/10"
+            if int(match.group(1)) == len(self.markers) + 1:
+                self.markers.append((int(match.group(1)), match.group(2), match.start(), match.end()))
+            self.scan_from = match.end()
+        return self._complete(len(self.markers) - 1)
+    
+    def close(self):
+        """Return the tweets still pending once the stream has ended"""
+        self.feed("\n")
+        return self._complete(len(self.markers))
+    
+    def _complete(self, upto):
+        tweets = []
+        while self.emitted < upto:
+            number, total, _, body_start = self.markers[self.emitted]
+            body_end = self.markers[self.emitted + 1][2] if self.emitted + 1 < len(self.markers) else len(self.buffer)
+            content = f"{number}/{total} {self.buffer[body_start:body_end].strip()}"
+            tweets.append({"tweet_number": number, "content": content, "character_count": len(content)})
+            self.emitted += 1
+        return tweets
+
+async def aformat_thread_json(thread, store=None):
+    """Run the JSON step over thread text and parse it, re-running the step once if parsing fails"""
+    import asyncio
+    
+    store = store or get_checkpoint_store()
+    json_step = get_step_chains()["json"]
+    inputs = {"thread": thread}
+    
+    try:
+        return parse_json_result(await store.arun("json", inputs, json_step.ainvoke))
+    except (ValueError, KeyError, TypeError):
+        print("JSON formatting failed - re-running the JSON step only...")
+        await asyncio.to_thread(store.drop, "json", inputs)
+        try:
+            return parse_json_result(await store.arun("json", inputs, json_step.ainvoke))
+        except (ValueError, KeyError, TypeError):
+            # Don't leave unusable output behind for the next run to reuse
+            await asyncio.to_thread(store.drop, "json", inputs)
+            raise
+
+async def agenerate_thread(blog_url, style=DEFAULT_THREAD_STYLE, refresh=False):
+    """Async generate_thread that yields each tweet as soon as the thread step has written it
+    
+    Fetching runs in a worker thread, key points come from the checkpoint when
+    present, and the thread step is streamed. Tweets are cut from the streamed
+    "1/n" text with locally computed character counts. If the model numbered
+    the thread some other way and no markers are found, the JSON step formats
+    it as in generate_thread, and its tweets are yielded instead.
+    
+        async for tweet in agenerate_thread(url):
+            print(tweet["tweet_number"], tweet["character_count"], tweet["content"])
+    """
+    import asyncio
+    
+    print(f"Processing: {blog_url}")
+    store = get_checkpoint_store()
+    steps = get_step_chains()
+    
+    blog_content = await asyncio.to_thread(load_blog_content, blog_url, store, refresh)
+    print(f"Extracted {len(blog_content)} characters")
+    
+    key_points = await store.arun("extract", {"blog_content": blog_content[:3000]}, steps["extract"].ainvoke)
+    
+    splitter = TweetSplitter()
+    thread_inputs = {"key_points": key_points, "style": style}
+    thread = await asyncio.to_thread(store.get, "thread", thread_inputs)
+    streamed = thread is None
+    if not streamed:
+        store.stats["hits"] += 1
+        print("  ↺ thread: reused checkpoint")
+        for tweet in splitter.feed(thread) + splitter.close():
+            yield tweet
+    else:
+        store.stats["misses"] += 1
+        print("  ▶ thread: streaming")
+        async for text in steps["thread"].astream(thread_inputs):
+            for tweet in splitter.feed(text):
+                yield tweet
+        for tweet in splitter.close():
+            yield tweet
+        thread = splitter.buffer.rstrip("\n")
+    
+    produced = bool(splitter.markers)
+    if not produced:
+        # No "i/n" numbering to stream from - fall back to the JSON step
+        print("  No 1/n markers in the thread - formatting it with the JSON step")
+        thread_data = await aformat_thread_json(thread, store)
+        produced = bool(thread_data["thread"])
+        for tweet in thread_data["thread"]:
+            yield tweet
+    
+    # Only a thread that produced tweets is worth resuming from
+    if streamed and produced:
+        await asyncio.to_thread(store.put, "thread", thread_inputs, thread)
+
+def generate_thread_variants(blog_url, styles):
+    """Generate one thread per style, all forked from the same cached key points"""
+    return {style: generate_thread(blog_url, style=style) for style in styles}
+
 if __name__ == "__main__":
     blog_url = "https://www.siddharthbharath.com/mastering-ai-coding-the-universal-playbook-of-tips-tricks-and-patterns/"
     